@@ -0,0 +1,284 @@
+import datetime
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# 总体序列使用的标签名
+TOTAL_LABEL = 'TOTAL'
+# 自动选择采样间隔时，每条序列的目标点数
+TARGET_POINTS = 500
+# 参与分析的指标：名称 -> (显示名称, 数值升高是否为劣化)
+METRICS = {
+    'latency': ('平均响应时间', True),
+    'error_rate': ('错误率', True),
+    'throughput': ('吞吐量', False),
+}
+
+
+def choose_interval(duration_s: float) -> int:
+    """
+    根据测试时长选择采样间隔，使每条序列约有TARGET_POINTS个点
+    Args:
+        duration_s: 测试时长（秒）
+    Returns:
+        int: 采样间隔（秒），至少为1
+    """
+    return max(1, math.ceil(duration_s / TARGET_POINTS))
+
+
+def build_interval_series(df, interval_s: Optional[int] = None) -> Dict[str, Any]:
+    """
+    将JTL数据按事务和时间间隔聚合为矩阵（行：事务，列：时间间隔）
+    最后一个不完整的间隔会被丢弃，避免吞吐量在结尾出现虚假的下降
+    Args:
+        df: JTL数据（需要timeStamp、elapsed、label、success列）
+        interval_s: 采样间隔（秒），为None时自动选择
+    Returns:
+        Dict: interval_s、start_ms、labels（最后一行为TOTAL），
+            以及各间隔的count（请求数）、elapsed_sum、elapsed_sq（响应时间平方和）、errors（失败数）
+    """
+    import pandas as pd
+
+    timestamps = df['timeStamp'].to_numpy(dtype=np.int64)
+    start_ms = int(timestamps.min())
+    duration_s = (int(timestamps.max()) - start_ms) / 1000
+    interval_s = interval_s or choose_interval(duration_s)
+    buckets = (timestamps - start_ms) // (interval_s * 1000)
+    n_buckets = max(int(duration_s // interval_s), 1)  # 只保留完整的间隔
+    keep = buckets < n_buckets
+
+    codes, labels = pd.factorize(df['label'])
+    n_labels = len(labels)
+    labeled = codes[keep] >= 0  # 没有名称的采样（factorize编号为-1）只计入总体序列
+    buckets = buckets[keep]
+    flat = codes[keep][labeled] * n_buckets + buckets[labeled]
+    size = n_labels * n_buckets
+    elapsed = df['elapsed'].to_numpy(dtype=np.float64)[keep]
+    failed = (df['success'] == False).to_numpy()[keep]  # noqa: E712  与parse_results的判定一致
+
+    def aggregate(weights=None) -> np.ndarray:
+        matrix = np.bincount(flat, weights=None if weights is None else weights[labeled],
+                             minlength=size).reshape(n_labels, n_buckets)
+        total = np.bincount(buckets, weights=weights, minlength=n_buckets)
+        return np.vstack([matrix, total]).astype(np.float64)  # 追加总体序列
+
+    return {
+        'interval_s': interval_s,
+        'start_ms': start_ms,
+        'labels': [str(label) for label in labels] + [TOTAL_LABEL],
+        'count': aggregate(),
+        'elapsed_sum': aggregate(elapsed),
+        'elapsed_sq': aggregate(elapsed ** 2),
+        'errors': aggregate(failed),
+    }
+
+
+def _fill_gaps(matrix: np.ndarray) -> np.ndarray:
+    """按行用前一个有效值填充NaN（行首的NaN用第一个有效值填充，全为NaN的行填0），仅用于绘图"""
+    n_rows, n_cols = matrix.shape
+    valid = ~np.isnan(matrix)
+    index = np.where(valid, np.arange(n_cols), 0)
+    np.maximum.accumulate(index, axis=1, out=index)
+    filled = matrix[np.arange(n_rows)[:, None], index]
+    first_value = matrix[np.arange(n_rows), np.argmax(valid, axis=1)]
+    filled = np.where(np.isnan(filled), first_value[:, None], filled)
+    return np.nan_to_num(filled, nan=0.0)
+
+
+def _noise_sigma(matrix: np.ndarray) -> np.ndarray:
+    """
+    用一阶差分估计每行的噪声标准差（少量均值突变只影响个别差分）
+    取MAD估计与标准差估计中的较大者：稀疏序列的MAD为0，会把任何波动都当作突变
+    """
+    if matrix.shape[1] < 2:
+        return np.zeros(matrix.shape[0])
+    diffs = np.diff(matrix, axis=1)
+    mad = np.median(np.abs(diffs - np.median(diffs, axis=1, keepdims=True)), axis=1)
+    return np.maximum(mad / 0.6745, diffs.std(axis=1)) / math.sqrt(2)
+
+
+def _binomial_llr(errors: np.ndarray, trials: np.ndarray, rate: np.ndarray) -> np.ndarray:
+    """二项分布下观测错误率相对于rate的对数似然比"""
+    llr = np.zeros(np.broadcast(errors, trials).shape)
+    for observed, expected in ((errors, trials * rate), (trials - errors, trials * (1 - rate))):
+        llr += np.where(observed > 0, observed * np.log(observed / expected), 0.0)
+    return llr
+
+
+def _split_stats(sums: np.ndarray, weights: np.ndarray, min_size: int, min_weight: float,
+                 binomial: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    计算每行在每个切分点的加权CUSUM均值突变统计量
+    切分点k把序列分为[0, k)和[k, n)两段，各间隔按权重（请求数）合并，没有请求的间隔不影响结果
+    Args:
+        sums: 各间隔的加权和（如响应时间之和、失败数）
+        weights: 各间隔的权重（如请求数），吞吐量等逐间隔指标为1
+        min_size: 每段的最少间隔数
+        min_weight: 每段的最小权重（如最少请求数）
+        binomial: 为True时用二项分布似然比（错误率），否则用两段均值之差的z统计量（未除以噪声标准差）
+    Returns:
+        Tuple: (统计量, 左段均值, 右段均值)，形状均为 行数 × (n-1)，不可切分的位置统计量为0
+    """
+    n = sums.shape[1]
+    cum_sum = np.cumsum(sums, axis=1)
+    cum_weight = np.cumsum(weights, axis=1)
+    sum_left, weight_left = cum_sum[:, :-1], cum_weight[:, :-1]
+    sum_right, weight_right = cum_sum[:, -1:] - sum_left, cum_weight[:, -1:] - weight_left
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        left = sum_left / weight_left
+        right = sum_right / weight_right
+        if binomial:
+            rate = cum_sum[:, -1:] / cum_weight[:, -1:]
+            llr = _binomial_llr(sum_left, weight_left, rate) + _binomial_llr(sum_right, weight_right, rate)
+            stat = np.sqrt(2 * np.maximum(llr, 0))
+        else:
+            stat = np.abs(left - right) / np.sqrt(1 / weight_left + 1 / weight_right)
+
+    k = np.arange(1, n)
+    invalid = (k < min_size) | (n - k < min_size) | (weight_left < min_weight) | (weight_right < min_weight)
+    stat = np.where(invalid | np.isnan(stat), 0.0, stat)
+    return stat, left, right
+
+
+def detect_changes(sums: np.ndarray, weights: np.ndarray, sigma: Optional[np.ndarray] = None,
+                   min_size: int = 5, min_weight: float = 0, binomial: bool = False,
+                   threshold: Optional[float] = None, min_relative_change: float = 0.2,
+                   max_changes: int = 5) -> List[List[int]]:
+    """
+    二分切分（binary segmentation）检测每行的均值突变点
+    第一层对所有行向量化计算，只有存在显著突变的行才逐段继续切分
+    Args:
+        sums: 行数 × 时间间隔数的加权和矩阵
+        weights: 与sums形状相同的权重矩阵
+        sigma: 每行单位权重的噪声标准差（binomial为True时不需要）
+        min_size: 每段的最少间隔数
+        min_weight: 每段的最小权重
+        binomial: 是否按二项分布（错误率）检验
+        threshold: 显著性阈值（以标准差为单位），默认为 max(4, sqrt(2·ln n) + 1.5)
+        min_relative_change: 相邻两段均值的最小相对变化
+        max_changes: 每行最多报告的突变点数
+    Returns:
+        List[List[int]]: 每行的突变点（新状态起始的间隔下标），升序
+    """
+    n_rows, n = sums.shape
+    results: List[List[int]] = [[] for _ in range(n_rows)]
+    if n < 2 * min_size:
+        return results
+    threshold = threshold or max(4.0, math.sqrt(2 * math.log(n)) + 1.5)
+    sigma = np.ones(n_rows) if binomial else np.maximum(sigma, 1e-9)
+
+    def significant(stat_row, left_row, right_row, row_sigma) -> Optional[int]:
+        best = int(np.argmax(stat_row))
+        if stat_row[best] / row_sigma < threshold:
+            return None
+        base = max(abs(left_row[best]), 1e-9)
+        if abs(right_row[best] - left_row[best]) / base < min_relative_change:
+            return None
+        return best + 1
+
+    # 第一层：所有行一起计算
+    stat, left, right = _split_stats(sums, weights, min_size, min_weight, binomial)
+    candidates = np.nonzero(stat.max(axis=1) / sigma >= threshold)[0]
+
+    for row in candidates:
+        split = significant(stat[row], left[row], right[row], sigma[row])
+        if split is None:
+            continue
+        changes = [split]
+        segments = [(0, split), (split, n)]
+        while segments and len(changes) < max_changes:
+            start, end = segments.pop(0)
+            if end - start < 2 * min_size:
+                continue
+            seg_stat, seg_left, seg_right = _split_stats(
+                sums[row:row + 1, start:end], weights[row:row + 1, start:end], min_size, min_weight, binomial)
+            split = significant(seg_stat[0], seg_left[0], seg_right[0], sigma[row])
+            if split is None:
+                continue
+            changes.append(start + split)
+            segments.extend([(start, start + split), (start + split, end)])
+        results[row] = sorted(changes)
+    return results
+
+
+def analyze_timeline(df, interval_s: Optional[int] = None, min_size: int = 5, min_samples: int = 30,
+                     min_relative_change: float = 0.2) -> Dict[str, Any]:
+    """
+    对各事务的响应时间、错误率和吞吐量序列做突变点检测
+    响应时间和错误率按请求数加权（请求稀少的间隔影响小），吞吐量按间隔计算
+    Args:
+        df: JTL数据
+        interval_s: 采样间隔（秒），为None时自动选择
+        min_size: 每个状态的最少间隔数
+        min_samples: 响应时间和错误率每个状态的最少请求数
+        min_relative_change: 报告的最小相对变化
+    Returns:
+        Dict: interval_s、start_ms、timeline（总体序列，供报告绘图）、
+            change_points（按发生时间排序的突变列表，每项包含label、metric、offset_s、end_offset_s、time、
+            before、after、change_pct、degraded）
+    """
+    series = build_interval_series(df, interval_s)
+    interval_s = series['interval_s']
+    labels = series['labels']
+    count = series['count']
+    n = count.shape[1]
+
+    # 单个请求响应时间的标准差
+    total = count.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = series['elapsed_sum'].sum(axis=1) / total
+        latency_sigma = np.sqrt(np.maximum(series['elapsed_sq'].sum(axis=1) / total - mean ** 2, 0))
+    throughput = count / interval_s
+
+    # 指标 -> (加权和, 权重, 噪声标准差, 每段最小权重, 是否二项检验, 显示倍数)
+    inputs = {
+        'latency': (series['elapsed_sum'], count, np.nan_to_num(latency_sigma), min_samples, False, 1),
+        'error_rate': (series['errors'], count, None, min_samples, True, 100),
+        'throughput': (throughput, np.ones_like(count), _noise_sigma(throughput), 0, False, 1),
+    }
+
+    change_points = []
+    for metric, (metric_name, higher_is_worse) in METRICS.items():
+        sums, weights, sigma, min_weight, binomial, scale = inputs[metric]
+        changes = detect_changes(sums, weights, sigma, min_size=min_size, min_weight=min_weight,
+                                 binomial=binomial, min_relative_change=min_relative_change)
+        for row, points in enumerate(changes):
+            if not points:
+                continue
+            bounds = [0] + points + [n]
+            means = [float(sums[row, a:b].sum() / weights[row, a:b].sum() * scale)
+                     for a, b in zip(bounds[:-1], bounds[1:])]
+            for i, point in enumerate(points):
+                before, after = means[i], means[i + 1]
+                timestamp_ms = series['start_ms'] + point * interval_s * 1000
+                change_points.append({
+                    'label': labels[row],
+                    'metric': metric,
+                    'metric_name': metric_name,
+                    'offset_s': point * interval_s,
+                    'end_offset_s': bounds[i + 2] * interval_s,  # 新状态持续到下一个突变点
+                    'time': datetime.datetime.fromtimestamp(timestamp_ms / 1000).strftime('%Y-%m-%d %H:%M:%S'),
+                    'before': round(before, 3),
+                    'after': round(after, 3),
+                    'change_pct': round((after - before) / before * 100, 1) if before else None,
+                    'degraded': (after > before) == higher_is_worse,
+                })
+    change_points.sort(key=lambda c: (c['offset_s'], c['label'] != TOTAL_LABEL, c['label']))
+
+    # 总体序列（没有请求的间隔沿用前一个值）
+    with np.errstate(invalid='ignore', divide='ignore'):
+        latency = _fill_gaps(series['elapsed_sum'][-1:] / count[-1:])[0]
+        error_rate = _fill_gaps(series['errors'][-1:] / count[-1:] * 100)[0]
+    return {
+        'interval_s': interval_s,
+        'start_ms': series['start_ms'],
+        'timeline': {
+            't': [i * interval_s for i in range(n)],
+            'latency': np.round(latency, 2).tolist(),
+            'error_rate': np.round(error_rate, 3).tolist(),
+            'throughput': np.round(throughput[-1], 3).tolist(),
+        },
+        'change_points': change_points,
+    }
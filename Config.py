@@ -0,0 +1,171 @@
+import configparser
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# 默认配置
+DEFAULT_CONFIG: Dict[str, Any] = {
+    'jmeter_home': None,  # Jmeter安装目录，必须设置
+    'test_dir': None,  # JMX文件目录，必须设置
+    'result_dir': 'test_results',  # 结果保存目录，默认为当前工作目录下的test_results
+    'max_workers': None,  # 最大并行数，None为线程池默认值
+    'shard': None,  # 分片，如 "2/4"，None为不分片
+    'include': [],  # 包含的JMX路径glob
+    'exclude': [],  # 排除的JMX路径glob
+    'tags': [],  # 需要具有的标签
+    'history_file': None,  # 计划历史耗时文件，None为结果目录下的plan_history.json
+    'preflight': True,  # 执行前对JMX做静态分析
+    'sanitize': False,  # 执行禁用了高开销元件的临时副本
+    'monitor_interval': 2.0,  # 压测机自监控采样间隔（秒），0为不监控
+    'isolate_cpus': False,  # 为每个并行执行的计划绑定互不重叠的CPU集合（Linux）
+    'jvm_sizing': True,  # 按计划峰值线程数设置JMeter堆大小
+    'log_json': False,  # 是否输出JSON结构化日志
+    'log_max_bytes': 0,  # 主日志按大小滚动的阈值（字节），为0时按天滚动
+    'profile_phases': [],  # 需要cProfile的阶段，如 ['parse_results', 'generate_charts']
+    'send_email': True,  # 是否发送邮件
+    'sender_email': '',  # 发件人邮箱，通过配置文件或环境变量设置
+    'sender_password': '',  # SMTP授权码，通过配置文件或环境变量设置
+    'recipient_email': '',  # 收件人邮箱，通过配置文件或环境变量设置
+    'smtp_server': "smtp.163.com",  # SMTP服务器
+    'smtp_port': 465,  # SMTP端口
+}
+
+# 环境变量 -> 配置项
+ENV_MAPPING = {
+    'JMETER_HOME': 'jmeter_home',
+    'TEST_DIR': 'test_dir',
+    'RESULT_DIR': 'result_dir',
+    'MAX_WORKERS': 'max_workers',
+    'JMETER_SHARD': 'shard',
+    'REPORT_SENDER_EMAIL': 'sender_email',
+    'REPORT_SENDER_PASSWORD': 'sender_password',
+    'REPORT_RECIPIENT_EMAIL': 'recipient_email',
+}
+
+# 配置文件中各节允许的配置项
+CONFIG_SECTIONS = {
+    'jmeter': ('jmeter_home', 'test_dir', 'result_dir', 'max_workers'),
+    'selection': ('shard', 'include', 'exclude', 'tags', 'history_file'),
+    'preflight': ('preflight', 'sanitize'),
+    'monitor': ('monitor_interval',),
+    'isolation': ('isolate_cpus', 'jvm_sizing'),
+    'logging': ('log_json', 'log_max_bytes', 'profile_phases'),
+    'email': ('send_email', 'sender_email', 'sender_password', 'recipient_email', 'smtp_server', 'smtp_port'),
+}
+
+
+# 必须设置的路径及其设置方式
+REQUIRED_PATHS = {
+    'jmeter_home': '配置文件[jmeter]节的jmeter_home、环境变量JMETER_HOME或--jmeter-home',
+    'test_dir': '配置文件[jmeter]节的test_dir、环境变量TEST_DIR或--test-dir',
+}
+
+# 发送邮件必需的配置项
+EMAIL_REQUIRED = ('sender_email', 'sender_password', 'recipient_email')
+
+
+class ConfigException(Exception): pass
+
+
+def require_paths(config: Dict[str, Any], *keys: str):
+    """
+    检查必须设置的路径
+    Args:
+        config: 配置字典
+        *keys: 需要的配置项，为空时检查REQUIRED_PATHS中的全部配置项
+    Raises:
+        ConfigException: 有未设置的配置项时抛出
+    """
+    missing = [key for key in keys or REQUIRED_PATHS if not config.get(key)]
+    if missing:
+        raise ConfigException('；'.join(f"未设置 {key}（通过{REQUIRED_PATHS[key]}设置）" for key in missing))
+
+
+def missing_email_settings(config: Dict[str, Any]) -> List[str]:
+    """
+    检查发送邮件必需的配置项
+    Args:
+        config: 配置字典
+    Returns:
+        List[str]: 未设置的配置项名称，为空表示已配置
+    """
+    return [key for key in EMAIL_REQUIRED if not config.get(key)]
+
+
+def _convert(key: str, value: Any) -> Any:
+    """
+    按默认值的类型转换配置值
+    Args:
+        key: 配置项名称
+        value: 原始值（通常为字符串）
+    Returns:
+        Any: 转换后的值
+    """
+    if not isinstance(value, str):
+        return value
+    value = value.strip()
+    default = DEFAULT_CONFIG.get(key)
+    try:
+        if key == 'max_workers':
+            return int(value) if value else None
+        if isinstance(default, bool):
+            if value.lower() not in ('1', '0', 'true', 'false', 'yes', 'no', 'on', 'off'):
+                raise ValueError(value)
+            return value.lower() in ('1', 'true', 'yes', 'on')
+        if isinstance(default, int):
+            return int(value)
+        if isinstance(default, float):
+            return float(value)
+        if isinstance(default, list):
+            return [item.strip() for item in value.split(',') if item.strip()]
+    except ValueError:
+        raise ConfigException(f"配置项 {key} 的值无效: {value}")
+    return value
+
+
+def load_config(config_file: Optional[Path] = None, overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    加载配置，优先级：命令行参数 > 环境变量 > 配置文件 > 默认值
+    配置文件为INI格式，包含[jmeter]、[selection]、[preflight]、[monitor]、[isolation]、[logging]、[email]等节，例如：
+        [jmeter]
+        jmeter_home = /opt/apache-jmeter-5.4.1
+        test_dir = /path/to/tests
+        result_dir = /path/to/results
+        max_workers = 4
+    Args:
+        config_file: 配置文件路径，为None时只使用默认值和环境变量
+        overrides: 命令行参数，值为None的项会被忽略
+    Returns:
+        Dict: 配置字典
+    Raises:
+        ConfigException: 配置文件不存在或配置项无效时抛出
+    """
+    config = dict(DEFAULT_CONFIG)
+
+    # 配置文件
+    if config_file is not None:
+        config_file = Path(config_file)
+        if not config_file.exists():
+            raise ConfigException(f"配置文件不存在: {config_file}")
+        parser = configparser.ConfigParser()
+        parser.read(config_file, encoding='utf-8')
+        for section in parser.sections():
+            allowed = CONFIG_SECTIONS.get(section)
+            if allowed is None:
+                raise ConfigException(f"未知的配置节: [{section}]")
+            for key, value in parser.items(section):
+                if key not in allowed:
+                    raise ConfigException(f"未知的配置项: [{section}] {key}")
+                config[key] = _convert(key, value)
+
+    # 环境变量
+    for env_name, key in ENV_MAPPING.items():
+        if os.environ.get(env_name):
+            config[key] = _convert(key, os.environ[env_name])
+
+    # 命令行参数
+    for key, value in (overrides or {}).items():
+        if value is not None:
+            config[key] = _convert(key, value)
+
+    return config
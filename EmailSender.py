@@ -74,4 +74,19 @@ class EmailSender:
             print("认证失败：请检查邮箱地址和SMTP授权码是否正确")
         except Exception as e:  # 处理其他异常
             print(f"邮件发送失败: {e}")
-        return False  # 返回发送失败标志
\ No newline at end of file
+        return False  # 返回发送失败标志
+
+    def send_report(self, recipient_email, report_file):
+        """
+        发送测试报告邮件（报告作为附件）
+
+        :param recipient_email: 收件人邮箱地址
+        :param report_file: HTML报告文件路径
+        :return: 是否发送成功
+        """
+        return self.send_email(
+            recipient_email=recipient_email,
+            subject="自动化性能测试报告",
+            body="自动化性能测试报告每日自动执行，详细报告数据请查看附件",
+            attachment_path=report_file
+        )
@@ -0,0 +1,245 @@
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import psutil  # 可选依赖，未安装时在Linux下读取/proc
+except ImportError:
+    psutil = None
+
+_PROC = Path('/proc')
+_CLK_TCK = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+# 压测机饱和判定阈值
+SATURATION_CPU_PERCENT = 90.0  # 压测进程占用可用CPU的比例
+SATURATION_HOST_CPU_PERCENT = 95.0  # 主机整体CPU使用率
+SATURATION_LOAD_PER_CPU = 1.5  # 每核1分钟平均负载
+SATURATION_MIN_RATIO = 0.2  # 超过阈值的采样占比达到该值即判定为饱和
+
+
+def monitor_available() -> bool:
+    """当前平台是否支持压测机自监控（安装了psutil或存在/proc）"""
+    return psutil is not None or _PROC.is_dir()
+
+
+def _proc_tree_pids(root_pid: int) -> List[int]:
+    """通过/proc查找进程及其所有子孙进程"""
+    children: Dict[int, List[int]] = {}
+    for entry in _PROC.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / 'stat').read_text()
+        except OSError:
+            continue
+        # 进程名可能包含空格和括号，从最后一个')'之后解析
+        fields = stat[stat.rfind(')') + 2:].split()
+        children.setdefault(int(fields[1]), []).append(int(entry.name))
+    pids, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(children.get(pid, []))
+    return pids
+
+
+def _proc_sample(pid: int) -> Optional[Tuple[float, int, int]]:
+    """
+    读取/proc中单个进程的累计CPU时间（秒）、RSS（字节）和线程数
+    Returns:
+        Optional[Tuple]: 进程已退出时返回None
+    """
+    try:
+        stat = (_PROC / str(pid) / 'stat').read_text()
+        statm = (_PROC / str(pid) / 'statm').read_text().split()
+    except OSError:
+        return None
+    fields = stat[stat.rfind(')') + 2:].split()
+    # fields[11]/[12]为utime/stime，fields[17]为线程数（从state开始计数）
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / _CLK_TCK
+    return cpu_seconds, int(statm[1]) * _PAGE_SIZE, int(fields[17])
+
+
+def _host_cpu_times() -> Optional[Tuple[float, float]]:
+    """读取主机CPU的(忙碌时间, 总时间)"""
+    try:
+        with open(_PROC / 'stat', 'r') as f:
+            values = [float(v) for v in f.readline().split()[1:]]
+    except OSError:
+        return None
+    idle = values[3] + (values[4] if len(values) > 4 else 0)  # idle + iowait
+    total = sum(values[:8])  # 不含guest（已计入user）
+    return total - idle, total
+
+
+class GeneratorMonitor:
+    """
+    压测机自监控
+    在后台线程中按固定间隔采样JMeter进程树（启动脚本及其JVM子进程）的CPU、RSS、线程数，
+    以及主机CPU和负载，用于判断结果是否因压测机饱和而失真
+    示例用法：
+        monitor = GeneratorMonitor(process.pid, interval=2.0)
+        monitor.start()
+        process.wait()
+        generator = monitor.stop()
+    """
+
+    def __init__(self, pid: int, interval: float = 2.0, cpu_count: Optional[int] = None):
+        """
+        初始化监控器
+        Args:
+            pid: JMeter进程ID
+            interval: 采样间隔（秒）
+            cpu_count: JMeter进程可用的CPU数（绑定CPU时），为None时为主机CPU核数
+        """
+        self.pid = pid
+        self.interval = interval
+        self.host_cpu_count = os.cpu_count() or 1
+        self.cpu_count = cpu_count or self.host_cpu_count
+        self.timeline: Dict[str, List[Any]] = {
+            't': [], 'cpu_percent': [], 'rss_mb': [], 'threads': [], 'host_cpu_percent': [], 'load1': []
+        }
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._cpu_seen: Dict[int, float] = {}  # 进程ID -> 上次采样时的累计CPU时间
+        self._host_prev: Optional[Tuple[float, float]] = None
+        self._started = 0.0
+
+    def start(self):
+        """启动采样线程"""
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name=f'monitor-{self.pid}', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Dict[str, Any]:
+        """
+        停止采样
+        Returns:
+            Dict: interval_s、timeline（按列存储的采样序列）和summary（汇总及饱和判定）
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        return {
+            'interval_s': self.interval,
+            'cpu_count': self.cpu_count,
+            'timeline': self.timeline,
+            'summary': self.summarize(self.timeline, self.cpu_count, self.host_cpu_count),
+        }
+
+    def _run(self):
+        last = time.perf_counter()
+        self._sample_tree()  # 建立CPU时间基准
+        self._host_prev = self._host_cpu()
+        while not self._stop_event.wait(self.interval):
+            now = time.perf_counter()
+            sample = self._sample_tree()
+            if sample is None:  # 进程已退出
+                break
+            cpu_seconds, rss, threads = sample
+            host = self._host_cpu()
+            host_percent = None
+            if host is not None and self._host_prev is not None and host[1] > self._host_prev[1]:
+                host_percent = (host[0] - self._host_prev[0]) / (host[1] - self._host_prev[1]) * 100
+            self._host_prev = host
+
+            self.timeline['t'].append(round(now - self._started, 2))
+            self.timeline['cpu_percent'].append(round(cpu_seconds / (now - last) * 100, 1))
+            self.timeline['rss_mb'].append(round(rss / 1024 / 1024, 1))
+            self.timeline['threads'].append(threads)
+            self.timeline['host_cpu_percent'].append(round(host_percent, 1) if host_percent is not None else None)
+            self.timeline['load1'].append(round(os.getloadavg()[0], 2) if hasattr(os, 'getloadavg') else None)
+            last = now
+
+    def _sample_tree(self) -> Optional[Tuple[float, int, int]]:
+        """
+        采样进程树
+        Returns:
+            Optional[Tuple]: (自上次采样以来消耗的CPU秒数, RSS字节, 线程数)，根进程已退出时返回None
+        """
+        samples = {}
+        if psutil is not None:
+            try:
+                root = psutil.Process(self.pid)
+                processes = [root] + root.children(recursive=True)
+            except psutil.NoSuchProcess:
+                return None
+            for process in processes:
+                try:
+                    with process.oneshot():
+                        cpu = process.cpu_times()
+                        samples[process.pid] = (cpu.user + cpu.system, process.memory_info().rss,
+                                                process.num_threads())
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+        else:
+            for pid in _proc_tree_pids(self.pid):
+                sample = _proc_sample(pid)
+                if sample is not None:
+                    samples[pid] = sample
+        if self.pid not in samples:
+            return None
+
+        # 按进程累计CPU时间求增量，新出现的进程从0开始计
+        cpu_delta = sum(cpu - self._cpu_seen.get(pid, 0.0) for pid, (cpu, _, _) in samples.items())
+        self._cpu_seen = {pid: cpu for pid, (cpu, _, _) in samples.items()}
+        return (max(cpu_delta, 0.0), sum(s[1] for s in samples.values()), sum(s[2] for s in samples.values()))
+
+    @staticmethod
+    def _host_cpu() -> Optional[Tuple[float, float]]:
+        """主机CPU的(忙碌时间, 总时间)"""
+        if psutil is not None:
+            times = psutil.cpu_times()
+            total = sum(times)
+            return total - times.idle - getattr(times, 'iowait', 0), total
+        return _host_cpu_times()
+
+    @staticmethod
+    def summarize(timeline: Dict[str, List[Any]], cpu_count: int,
+                  host_cpu_count: Optional[int] = None) -> Dict[str, Any]:
+        """
+        汇总采样并判定压测机是否饱和
+        Args:
+            timeline: 按列存储的采样序列
+            cpu_count: JMeter进程可用的CPU数
+            host_cpu_count: 主机CPU核数，用于判断每核负载，为None时与cpu_count相同
+        Returns:
+            Dict: max/avg指标、saturated（是否饱和）和reasons（饱和原因）
+        """
+        cpu = timeline['cpu_percent']
+        if not cpu:
+            return {'samples': 0, 'saturated': False, 'reasons': []}
+
+        def ratio(values: List[Optional[float]], threshold: float) -> float:
+            values = [v for v in values if v is not None]
+            return sum(v >= threshold for v in values) / len(values) if values else 0.0
+
+        reasons = []
+        # 进程CPU以单核为100%，换算为占全部核心的比例
+        cpu_share = [v / cpu_count for v in cpu]
+        if ratio(cpu_share, SATURATION_CPU_PERCENT) >= SATURATION_MIN_RATIO:
+            reasons.append(f"JMeter进程CPU占用达到可用CPU的{SATURATION_CPU_PERCENT:.0f}%以上"
+                           f"（{ratio(cpu_share, SATURATION_CPU_PERCENT) * 100:.0f}%的采样）")
+        host = timeline['host_cpu_percent']
+        if ratio(host, SATURATION_HOST_CPU_PERCENT) >= SATURATION_MIN_RATIO:
+            reasons.append(f"主机CPU使用率达到{SATURATION_HOST_CPU_PERCENT:.0f}%以上"
+                           f"（{ratio(host, SATURATION_HOST_CPU_PERCENT) * 100:.0f}%的采样）")
+        host_cpu_count = host_cpu_count or cpu_count
+        load = [v / host_cpu_count if v is not None else None for v in timeline['load1']]
+        if ratio(load, SATURATION_LOAD_PER_CPU) >= SATURATION_MIN_RATIO:
+            reasons.append(f"主机每核负载超过{SATURATION_LOAD_PER_CPU}")
+
+        valid_host = [v for v in host if v is not None]
+        return {
+            'samples': len(cpu),
+            'max_cpu_percent': max(cpu),
+            'avg_cpu_percent': sum(cpu) / len(cpu),
+            'max_rss_mb': max(timeline['rss_mb']),
+            'max_threads': max(timeline['threads']),
+            'max_host_cpu_percent': max(valid_host) if valid_host else None,
+            'saturated': bool(reasons),
+            'reasons': reasons,
+        }
@@ -1,12 +1,24 @@
+import json
 import os
+import shutil
 import subprocess
-import pandas as pd
+import tempfile
+import time
 from typing import Dict, List, Any
 import concurrent.futures
 import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Sequence, Tuple
+import numpy as np
 import TestUtils
+from Profiler import PhaseProfiler
+from Sharding import PlanHistory, balance_shards, filter_plans
+from GeneratorMonitor import GeneratorMonitor, monitor_available
+from JmxAnalyzer import JmxAnalyzer, JmxParseException
+from PlanIsolation import (CpuAllocator, available_cpus, format_cpus, heap_size_mb, isolation_available,
+                           jvm_env, pin_command)
+from ResultModel import ERROR_DTYPE, TRANSACTION_DTYPE, PlanResult, RunResults, StringTable
+from RunManifest import RunManifest, STATE_DONE, STATE_FAILED, STATE_QUEUED, STATE_RUNNING
 # 自定义异常
 class JMeterNotFoundException(Exception): pass
 class JMXFileNotFoundException(Exception): pass
@@ -14,17 +26,35 @@ class TestExecutionException(Exception): pass
 class JMeterTestException(Exception): pass
 
 class JMeterTestRunner:
-    def __init__(self, jmeter_home: str, test_dir: str, result_base_dir: str):
+    def __init__(self, jmeter_home: str, test_dir: str, result_base_dir: str,
+                 log_json: bool = False, log_max_bytes: int = 0,
+                 profiler: Optional[PhaseProfiler] = None, max_workers: Optional[int] = None,
+                 shard: Optional[Tuple[int, int]] = None, include: Sequence[str] = (),
+                 exclude: Sequence[str] = (), tags: Sequence[str] = (), history_file: Optional[str] = None,
+                 resume: Optional[str] = None, preflight: bool = True, sanitize: bool = False,
+                 monitor_interval: float = 2.0, isolate_cpus: bool = False, jvm_sizing: bool = True):
         """
         初始化JMeter测试运行器
         Args:
             jmeter_home: JMeter安装目录
             test_dir: 包含JMX文件的测试目录
             result_base_dir: 结果基础目录
+            log_json: 是否输出JSON结构化日志
+            log_max_bytes: 主日志按大小滚动的阈值（字节），为0时按天滚动
+            profiler: 阶段性能分析器，为None时不记录
+            max_workers: 最大并行数，为None时使用线程池默认值
+            shard: (分片序号, 分片总数)，序号从1开始，为None时执行全部计划
+            include: 包含的JMX路径glob
+            exclude: 排除的JMX路径glob
+            tags: 需要具有的标签（任意一个即可）
+            history_file: 计划历史耗时文件，默认为结果基础目录下的plan_history.json
+            resume: 恢复中断的运行，'latest'为结果基础目录下最近一次运行，也可指定运行清单文件路径
+            preflight: 是否在执行前对JMX做静态分析
+            sanitize: 是否执行禁用了高开销元件（监听器、调试元件）的临时副本
+            monitor_interval: 压测机自监控的采样间隔（秒），为0时不监控
+            isolate_cpus: 是否为每个并行执行的计划绑定互不重叠的CPU集合（Linux）
+            jvm_sizing: 是否按计划的峰值线程数（来自预检）设置JMeter堆大小
         """
-        # 设置Java和JMeter的编码环境
-        os.environ['JAVA_TOOL_OPTIONS'] = '-Dfile.encoding=UTF-8'
-        os.environ['JMETER_OPTS'] = '-Dfile.encoding=UTF-8'
         # 将路径转换为Path对象以便更好地处理
         self.jmeter_home = Path(jmeter_home)
         self.test_dir = Path(test_dir)
@@ -35,22 +65,68 @@ class JMeterTestRunner:
 
         # 设置日志
         log_dir = self.result_base_dir / 'logs'
-        self.logger = TestUtils.TestUtils.setup_logging(log_dir)
+        self.logger = TestUtils.TestUtils.setup_logging(log_dir, json_format=log_json,
+                                                        max_bytes=log_max_bytes)
 
         # 检查JMeter安装
         if not TestUtils.TestUtils.check_jmeter_installation(self.jmeter_home):
             raise JMeterNotFoundException(f"JMeter未在指定目录找到: {self.jmeter_home}")
 
         # 设置JMeter可执行文件路径
-        self.jmeter_bin = self.jmeter_home / 'bin' / 'jmeter.bat'
+        self.jmeter_bin = TestUtils.TestUtils.get_jmeter_bin(self.jmeter_home)
         # 生成时间戳用于结果目录命名
         self.timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-        # 存储所有测试结果的字典
-        self.all_results = {}
+        # 本次进程启动的时间戳，恢复运行时与沿用的原运行时间戳不同
+        self.session_timestamp = self.timestamp
+        # 存储所有测试结果（计划名称 -> PlanResult，共享字符串表）
+        self.all_results = RunResults()
+        # 阶段性能分析器
+        self.profiler = profiler or PhaseProfiler(enabled=False)
+        # 最大并行数
+        self.max_workers = max_workers
+        # 计划筛选与分片
+        self.shard = shard
+        self.include = list(include or [])
+        self.exclude = list(exclude or [])
+        self.tags = list(tags or [])
+        # 计划历史耗时，用于按耗时均衡分片
+        self.plan_history = PlanHistory(Path(history_file) if history_file
+                                        else self.result_base_dir / 'plan_history.json')
+        self.shard_split: Optional[Dict[str, Any]] = None  # 本次分片的输入和分配结果，写入分片清单
+
+        # JMX静态分析：计划名称 -> 分析器（每个文件只解析一次）
+        self.preflight = preflight or sanitize
+        self.sanitize = sanitize
+        self.analyzers: Dict[str, JmxAnalyzer] = {}
+
+        # 压测机自监控
+        self.monitor_interval = monitor_interval if monitor_available() else 0
+        if monitor_interval and not self.monitor_interval:
+            self.logger.warning("当前平台不支持压测机自监控（需要psutil或/proc），已跳过")
+
+        # CPU隔离与JVM堆大小（编码等JVM参数通过每个JMeter进程的环境变量设置）
+        self.isolate_cpus = isolate_cpus and isolation_available()
+        if isolate_cpus and not self.isolate_cpus:
+            self.logger.warning("当前平台不支持CPU亲和性设置（仅Linux，需要taskset命令），已跳过CPU隔离")
+        self.jvm_sizing = jvm_sizing
+        self.cpu_allocator: Optional[CpuAllocator] = None
+        self.concurrency = 1  # 并行执行的计划数，用于限制堆大小之和
+
+        # 运行清单：恢复时沿用原运行的时间戳和结果目录，已完成的计划不再重跑
+        self.resumed_plans = set()
+        if resume:
+            manifest_file = (RunManifest.find_latest(self.result_base_dir) if resume == 'latest'
+                             else Path(resume))
+            self.manifest = RunManifest.load(manifest_file)
+            self.timestamp = self.manifest.run_info['timestamp']
+            self.result_dir = manifest_file.parent
+            self.logger.info(f"恢复运行 {self.timestamp}: {manifest_file}")
+        else:
+            self.manifest = RunManifest.create(self.result_dir, self.timestamp, test_dir=str(self.test_dir))
 
     def find_jmx_files(self) -> List[Path]:
         """
-        在测试目录中查找所有JMX文件
+        在测试目录中查找JMX文件，并按glob/标签筛选、按分片选择
         Returns:
             List[Path]: JMX文件路径列表
         Raises:
@@ -60,73 +136,215 @@ class JMeterTestRunner:
         jmx_files = list(self.test_dir.glob('**/*.jmx'))
         if not jmx_files:
             raise JMXFileNotFoundException(f"在目录 {self.test_dir} 中未找到JMX文件")
+
+        # 按glob和标签筛选
+        if self.include or self.exclude or self.tags:
+            jmx_files = filter_plans(jmx_files, self.test_dir, self.include, self.exclude, self.tags)
+            if not jmx_files:
+                raise JMXFileNotFoundException(f"在目录 {self.test_dir} 中没有符合筛选条件的JMX文件")
+
+        # 执行前静态分析
+        if self.preflight:
+            self.analyze_plans(jmx_files)
+
+        # 按历史耗时均衡分片（没有历史的计划使用静态分析估算的时长），只保留当前分片的计划
+        if self.shard:
+            index, total = self.shard
+            durations = self.expected_durations()
+            shards = balance_shards(jmx_files, durations, total)
+            self.shard_split = {
+                'plans': sorted(jmx.stem for jmx in jmx_files),
+                'shards': [[jmx.stem for jmx in shard] for shard in shards],
+                'durations': {jmx.stem: durations[jmx.stem] for jmx in jmx_files if jmx.stem in durations},
+            }
+            jmx_files = shards[index - 1]
+            self.logger.info(f"分片 {index}/{total}: {len(jmx_files)} 个计划 "
+                             f"（各分片计划数: {[len(s) for s in shards]}）")
         return jmx_files
 
-    def run_single_test(self, jmx_file: Path) -> Optional[Dict[str, Any]]:
+    def analyze_plans(self, jmx_files: List[Path]):
+        """
+        对测试计划做静态分析，记录会限制压测机吞吐的元件
+        Args:
+            jmx_files: JMX文件列表
+        """
+        for jmx_file in jmx_files:
+            if jmx_file.stem in self.analyzers:
+                continue
+            try:
+                analyzer = JmxAnalyzer(jmx_file)
+            except JmxParseException as e:
+                self.logger.warning(str(e))
+                continue
+            self.analyzers[jmx_file.stem] = analyzer
+            analysis = analyzer.analyze()
+            for finding in analysis['findings']:
+                self.logger.warning(f"[预检] {jmx_file.stem}: {finding['element']}「{finding['name']}」"
+                                    f"{finding['message']}")
+
+    def expected_durations(self) -> Dict[str, float]:
+        """
+        各计划的预期耗时：优先使用历史耗时，其次使用静态分析估算的时长
+        Returns:
+            Dict: 计划名称 -> 预期耗时（秒）
+        """
+        durations = {name: analyzer.analyze()['estimated_duration_s'] for name, analyzer in self.analyzers.items()}
+        durations = {name: d for name, d in durations.items() if d is not None}
+        durations.update(self.plan_history.durations)
+        return durations
+
+    def run_single_test(self, jmx_file: Path) -> PlanResult:
         """
         运行单个JMX文件的测试
         Args:
             jmx_file: JMX文件路径
         Returns:
-            Optional[Dict]: 测试结果统计，失败时返回None
+            PlanResult: 测试结果（兼容原结果字典的接口），附加summary_file等字段
         Raises:
             TestExecutionException: 测试执行失败时抛出
         """
+        # 获取测试名称并创建结果目录
+        test_name = jmx_file.stem
+        test_result_dir = self.result_dir / f"{test_name}_{self.timestamp}"
+        jtl_file = test_result_dir / f"{test_name}.jtl"
+        report_dir = test_result_dir / "html_report"
+
+        # 清理上次中断留下的结果（JMeter会追加JTL，且要求报告目录为空）
+        if jtl_file.exists():
+            jtl_file.unlink()
+        if report_dir.exists():
+            shutil.rmtree(report_dir)
+
+        # 创建结果目录，并为该计划开启独立日志文件
+        test_result_dir.mkdir(parents=True, exist_ok=True)
+        TestUtils.TestUtils.open_plan_log(test_name, test_result_dir / f"{test_name}.log")
+        logger = TestUtils.TestUtils.plan_logger(self.logger, test_name)
+        self.manifest.record(test_name, STATE_RUNNING)
+
+        with self.profiler.span(f'plan:{test_name}', 'plan'):
+            sanitized_jmx = None
+            try:
+                # 需要时生成禁用高开销元件的临时副本（与原文件同目录，保证相对路径有效）
+                analyzer = self.analyzers.get(test_name)
+                run_jmx = jmx_file
+                if self.sanitize and analyzer and any(f['sanitizable'] for f in analyzer.analyze()['findings']):
+                    fd, tmp_name = tempfile.mkstemp(prefix=f'.{test_name}_', suffix='.sanitized', dir=jmx_file.parent)
+                    os.close(fd)
+                    sanitized_jmx = Path(tmp_name)
+                    disabled = analyzer.write_sanitized(sanitized_jmx)
+                    run_jmx = sanitized_jmx
+                    logger.info(f"使用净化副本执行，已禁用 {disabled} 个高开销元件: {sanitized_jmx}")
+
+                # 构建JMeter命令
+                command = [
+                    str(self.jmeter_bin),
+                    '-Jjmeter.save.saveservice.output_format=csv',  # 设置输出格式为CSV
+                    '-Jfile.encoding=UTF-8',  # 设置文件编码
+                    '-n',  # 非GUI模式
+                    '-t', str(run_jmx),  # 测试文件
+                    '-l', str(jtl_file),  # 结果文件
+                    '-e',  # 生成测试报告
+                    '-o', str(report_dir)  # 报告输出目录
+                ]
+
+                logger.info(f"开始执行测试计划: {test_name}")
+
+                # 按峰值线程数设置堆大小，隔离模式下独占一组CPU
+                heap_mb = (heap_size_mb(analyzer.analyze()['peak_threads'], self.concurrency)
+                           if self.jvm_sizing and analyzer else None)
+                cpus = self.cpu_allocator.acquire() if self.cpu_allocator else None
+                if heap_mb or cpus:
+                    logger.info(f"JVM堆: {f'{heap_mb}MB' if heap_mb else '默认'}，"
+                                f"CPU: {format_cpus(cpus) if cpus else '不限'}")
+
+                # 执行命令并捕获输出
+                started = time.perf_counter()
+                try:
+                    with self.profiler.span('jmeter', 'jmeter', plan=test_name):
+                        stdout, stderr, generator = self._execute(command, jvm_env(heap_mb, cpus), cpus)
+                finally:
+                    if cpus:
+                        self.cpu_allocator.release(cpus)
+                duration = time.perf_counter() - started
+
+                # 记录JMeter输出
+                logger.debug(f"JMeter输出:\n{stdout}")
+                if stderr:
+                    logger.warning(f"JMeter警告:\n{stderr}")
+                if generator and generator['summary']['saturated']:
+                    logger.warning(f"压测机饱和，结果可能反映的是压测机而非被测系统: "
+                                   f"{'；'.join(generator['summary']['reasons'])}")
+
+                logger.info(f"测试完成: {test_name}")
+
+                # 检查结果文件
+                if not jtl_file.exists():
+                    raise TestExecutionException(f"结果文件未生成: {jtl_file}")
+
+                # 解析结果并返回
+                with self.profiler.span('parse_results', 'phase', plan=test_name):
+                    results = self.parse_results(jtl_file, test_name)
+                for change in results.get('timeline', {}).get('change_points', []):
+                    if change['degraded']:
+                        logger.warning(f"{change['time']} 起 {change['label']} 的{change['metric_name']}"
+                                       f"由 {change['before']:g} 变为 {change['after']:g}")
+                results['report_dir'] = str(report_dir)
+                results['duration_s'] = duration  # JMeter执行耗时，用于分片均衡
+                if generator:
+                    results['generator'] = generator  # 压测机资源采样及饱和判定
+                if heap_mb or cpus:
+                    results['isolation'] = {'heap_mb': heap_mb, 'cpus': cpus}
+                if analyzer:
+                    results['preflight'] = dict(analyzer.analyze(), sanitized=sanitized_jmx is not None)
+
+                # 保存结果摘要，供 report 子命令单独生成报告
+                summary_file = test_result_dir / 'summary.npz'
+                TestUtils.TestUtils.save_summary(results, summary_file)
+                results['summary_file'] = str(summary_file)
+                return results
+
+            except subprocess.CalledProcessError as e:
+                logger.error(f"执行测试失败 {test_name}: {e}")
+                logger.error(f"错误输出: {e.stderr}")
+                raise TestExecutionException(f"执行测试 {test_name} 失败: {e}")
+            except Exception as e:
+                logger.error(f"测试过程发生异常 {test_name}: {e}")
+                raise TestExecutionException(f"测试 {test_name} 发生异常: {e}")
+            finally:
+                if sanitized_jmx is not None and sanitized_jmx.exists():
+                    sanitized_jmx.unlink()
+                TestUtils.TestUtils.close_plan_log(test_name)
+
+    def _execute(self, command: List[str], env: Optional[Dict[str, str]] = None,
+                 cpus: Optional[List[int]] = None) -> Tuple[str, str, Optional[Dict[str, Any]]]:
+        """
+        执行JMeter命令，并在执行期间采样压测机资源
+        Args:
+            command: JMeter命令
+            env: JMeter进程的环境变量，为None时继承当前进程
+            cpus: 绑定的CPU，JMeter启动的JVM子进程会继承该亲和性，为None时不绑定
+        Returns:
+            Tuple: (标准输出, 标准错误, 压测机采样结果，未监控时为None)
+        Raises:
+            subprocess.CalledProcessError: JMeter返回非0时抛出
+        """
+        process = subprocess.Popen(pin_command(command, cpus), stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   text=True, env=env)
+        monitor = (GeneratorMonitor(process.pid, self.monitor_interval, cpu_count=len(cpus) if cpus else None)
+                   if self.monitor_interval else None)
+        if monitor:
+            monitor.start()
         try:
-            # 获取测试名称并创建结果目录
-            test_name = jmx_file.stem
-            test_result_dir = self.result_dir / f"{test_name}_{self.timestamp}"
-            jtl_file = test_result_dir / f"{test_name}.jtl"
-            report_dir = test_result_dir / "html_report"
-
-            # 创建结果目录
-            test_result_dir.mkdir(parents=True, exist_ok=True)
-
-            # 构建JMeter命令
-            command = [
-                str(self.jmeter_bin),
-                '-Jjmeter.save.saveservice.output_format=csv',  # 设置输出格式为CSV
-                '-Jfile.encoding=UTF-8',  # 设置文件编码
-                '-n',  # 非GUI模式
-                '-t', str(jmx_file),  # 测试文件
-                '-l', str(jtl_file),  # 结果文件
-                '-e',  # 生成测试报告
-                '-o', str(report_dir)  # 报告输出目录
-            ]
-
-            self.logger.info(f"开始执行测试计划: {test_name}")
-
-            # 执行命令并捕获输出
-            process = subprocess.run(
-                command,
-                capture_output=True,
-                text=True,
-                check=True
-            )
-
-            # 记录JMeter输出
-            self.logger.debug(f"JMeter输出:\n{process.stdout}")
-            if process.stderr:
-                self.logger.warning(f"JMeter警告:\n{process.stderr}")
-
-            self.logger.info(f"测试完成: {test_name}")
-
-            # 检查结果文件
-            if not jtl_file.exists():
-                raise TestExecutionException(f"结果文件未生成: {jtl_file}")
-
-            # 解析结果并返回
-            results = self.parse_results(jtl_file, test_name)
-            results['report_dir'] = str(report_dir)
-            return results
-
-        except subprocess.CalledProcessError as e:
-            self.logger.error(f"执行测试失败 {test_name}: {e}")
-            self.logger.error(f"错误输出: {e.stderr}")
-            raise TestExecutionException(f"执行测试 {test_name} 失败: {e}")
-        except Exception as e:
-            self.logger.error(f"测试过程发生异常 {test_name}: {e}")
-            raise TestExecutionException(f"测试 {test_name} 发生异常: {e}")
+            stdout, stderr = process.communicate()
+        except BaseException:
+            process.kill()
+            raise
+        finally:
+            generator = monitor.stop() if monitor else None
+
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, command, stdout, stderr)
+        return stdout, stderr, generator
 
     def run_all_tests(self):
         """
@@ -139,12 +357,44 @@ class JMeterTestRunner:
             jmx_files = self.find_jmx_files()
             self.logger.info(f"找到 {len(jmx_files)} 个JMX文件")
 
+            # 恢复运行时加载已完成计划的结果，其余计划进入队列
+            pending = []
+            for jmx in jmx_files:
+                summary_file = self.manifest.completed_summary(jmx.stem)
+                if summary_file:
+                    result = TestUtils.TestUtils.load_summary(summary_file)
+                    result['summary_file'] = str(summary_file)
+                    self.all_results[jmx.stem] = result
+                    self.resumed_plans.add(jmx.stem)
+                else:
+                    pending.append(jmx)
+                    self.manifest.record(jmx.stem, STATE_QUEUED)
+            if self.resumed_plans:
+                self.logger.info(f"跳过已完成的 {len(self.resumed_plans)} 个计划，剩余 {len(pending)} 个")
+
+            # 预期耗时长的计划先提交，缩短整体执行时间
+            expected = self.expected_durations()
+            pending.sort(key=lambda jmx: -expected.get(jmx.stem, 0))
+
+            # 并行数：隔离模式下每个并行计划独占一组CPU，并行数不超过CPU数
+            max_workers = self.max_workers
+            if self.isolate_cpus and pending:
+                cpus = available_cpus()
+                requested = min(self.max_workers or len(cpus), len(pending))
+                slots = min(requested, len(cpus))
+                if slots < requested:
+                    self.logger.warning(f"可用CPU只有 {len(cpus)} 个，CPU隔离模式下并行数由 {requested} 降为 {slots}")
+                self.cpu_allocator = CpuAllocator(cpus, slots)
+                max_workers = slots
+                self.logger.info(f"CPU隔离: {' | '.join(format_cpus(c) for c in self.cpu_allocator.cpu_sets)}")
+            self.concurrency = max(1, min(len(pending), max_workers or min(32, (os.cpu_count() or 1) + 4)))
+
             failed_tests = []
             # 使用线程池并行执行测试
-            with concurrent.futures.ThreadPoolExecutor() as executor:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
                 future_to_jmx = {
                     executor.submit(self.run_single_test, jmx): jmx
-                    for jmx in jmx_files
+                    for jmx in pending
                 }
 
                 # 处理完成的测试
@@ -154,85 +404,129 @@ class JMeterTestRunner:
                         result = future.result()
                         if result:
                             self.all_results[jmx.stem] = result
+                            self.manifest.record(jmx.stem, STATE_DONE, summary=os.path.relpath(
+                                result['summary_file'], self.result_dir))
                         else:
                             failed_tests.append(jmx.stem)
+                            self.manifest.record(jmx.stem, STATE_FAILED)
                     except Exception as e:
                         self.logger.error(f"测试 {jmx.stem} 执行失败: {e}")
                         failed_tests.append(jmx.stem)
+                        self.manifest.record(jmx.stem, STATE_FAILED, error=str(e))
 
             # 记录失败的测试
             if failed_tests:
                 self.logger.warning(f"以下测试执行失败: {', '.join(failed_tests)}")
 
+            if self.shard:
+                # 分片执行时不更新历史耗时：各节点必须用同一份历史计算分配，耗时由merge统一合并
+                self.write_shard_manifest([jmx.stem for jmx in jmx_files], failed_tests)
+            else:
+                # 更新计划历史耗时
+                self.plan_history.update({name: r['duration_s'] for name, r in self.all_results.items()
+                                          if name not in self.resumed_plans})
+                self.plan_history.save()
+
         except Exception as e:
             self.logger.error(f"执行测试套件时发生错误: {e}")
             raise
 
-    def parse_results(self, jtl_file: Path, test_name: str) -> Dict[str, Any]:
+    def write_shard_manifest(self, plans: List[str], failed_tests: List[str]) -> Path:
+        """
+        写出分片清单（分片信息、计划列表、分配所用的全部计划和耗时、各计划摘要文件的相对路径和耗时）
+        Args:
+            plans: 本分片的计划名称
+            failed_tests: 失败的计划名称
+        Returns:
+            Path: 清单文件路径
+        """
+        index, total = self.shard
+        manifest_file = self.result_dir / f'shard_{index}_of_{total}.json'
+        manifest = {
+            'shard': [index, total],
+            'timestamp': self.timestamp,
+            'plans': plans,
+            'failed': failed_tests,
+            'split': self.shard_split,
+            'summaries': {
+                name: os.path.relpath(r['summary_file'], self.result_dir)
+                for name, r in self.all_results.items()
+            },
+            'durations': {name: r['duration_s'] for name, r in self.all_results.items()},
+        }
+        with open(manifest_file, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        self.logger.info(f"分片清单已保存: {manifest_file}")
+        return manifest_file
+
+    @staticmethod
+    def parse_results(jtl_file: Path, test_name: str) -> PlanResult:
         """
         解析JMeter测试结果
         Args:
             jtl_file: JTL结果文件路径
             test_name: 测试名称
         Returns:
-            Dict: 包含测试结果统计的字典
+            PlanResult: 测试结果（兼容原结果字典的接口），timeline为按时间间隔的突变点检测结果
+                （见ChangePoint.analyze_timeline）
         """
-        # 初始化结果统计字典
-        summary = {
-            'test_name': test_name,
-            'total_requests': 0,
-            'successful_requests': 0,
-            'failed_requests': 0,
-            'average_response_time': 0,
-            'min_response_time': float('inf'),
-            'max_response_time': 0,
-            'error_details': [],
-            'transactions': {},
-            'tps': 0,
-            'error_rate': 0
-        }
+        import pandas as pd  # 延迟导入，避免拖慢命令行启动
 
         # 读取CSV文件进行结果分析
         df = pd.read_csv(jtl_file)
+        strings = StringTable()
+        success = (df['success'] == True).to_numpy()
+        failed = (df['success'] == False).to_numpy()
 
         # 基本统计
-        summary['total_requests'] = len(df)
-        summary['successful_requests'] = len(df[df['success'] == True])
-        summary['failed_requests'] = len(df[df['success'] == False])
-        summary['average_response_time'] = df['elapsed'].mean()
-        summary['min_response_time'] = df['elapsed'].min()
-        summary['max_response_time'] = df['elapsed'].max()
+        summary = {
+            'total_requests': len(df),
+            'successful_requests': int(success.sum()),
+            'failed_requests': int(failed.sum()),
+            'average_response_time': float(df['elapsed'].mean()),
+            'min_response_time': float(df['elapsed'].min()),
+            'max_response_time': float(df['elapsed'].max()),
+        }
 
         # 计算TPS
         test_duration = (df['timeStamp'].max() - df['timeStamp'].min()) / 1000  # 转换为秒
-        summary['tps'] = summary['total_requests'] / test_duration if test_duration > 0 else 0
+        summary['tps'] = float(summary['total_requests'] / test_duration) if test_duration > 0 else 0
 
         # 计算错误率
         summary['error_rate'] = (summary['failed_requests'] / summary['total_requests'] * 100
                                  if summary['total_requests'] > 0 else 0)
 
-        # 按事务名称分组统计
-        for label, group in df.groupby('label'):
-            summary['transactions'][label] = {
-                'count': len(group),
-                'success': len(group[group['success'] == True]),
-                'fail': len(group[group['success'] == False]),
-                'avg_response_time': group['elapsed'].mean(),
-                'min_response_time': group['elapsed'].min(),
-                'max_response_time': group['elapsed'].max(),
-                'error_rate': (len(group[group['success'] == False]) / len(group) * 100
-                               if len(group) > 0 else 0)
-            }
+        # 按事务名称分组统计（按名称排序，没有名称的采样不计入）
+        codes, labels = pd.factorize(df['label'], sort=True)
+        valid = codes >= 0
+        codes = codes[valid]
+        elapsed = df['elapsed'].to_numpy(dtype=np.float64)[valid]
+        n_labels = len(labels)
+        transactions = np.zeros(n_labels, dtype=TRANSACTION_DTYPE)
+        transactions['label'] = strings.intern_many(labels)
+        transactions['count'] = np.bincount(codes, minlength=n_labels)
+        transactions['success'] = np.bincount(codes, weights=success[valid], minlength=n_labels)
+        transactions['fail'] = np.bincount(codes, weights=failed[valid], minlength=n_labels)
+        transactions['elapsed_sum'] = np.bincount(codes, weights=elapsed, minlength=n_labels)
+        if n_labels:
+            extremes = pd.Series(elapsed).groupby(codes).agg(['min', 'max'])
+            transactions['min'] = extremes['min'].to_numpy()
+            transactions['max'] = extremes['max'].to_numpy()
+
+        # 收集错误详情（字符串列去重后存入字符串表）
+        error_df = df[failed]
+        errors = np.zeros(len(error_df), dtype=ERROR_DTYPE)
+        for field, column in (('label', 'label'), ('response_code', 'responseCode'),
+                              ('message', 'failureMessage'), ('thread', 'threadName')):
+            column_codes, uniques = pd.factorize(error_df[column], use_na_sentinel=False)
+            errors[field] = strings.intern_many(uniques)[column_codes] if len(uniques) else 0
+        errors['timestamp'] = error_df['timeStamp'].to_numpy(dtype=np.int64)
+
+        result = PlanResult(test_name, strings, transactions, errors, **summary)
+
+        # 按时间间隔检测各事务响应时间、错误率和吞吐量的突变（如长稳测试后期的性能劣化）
+        if len(df) > 0:
+            from ChangePoint import analyze_timeline  # 延迟导入，避免拖慢命令行启动
+            result['timeline'] = analyze_timeline(df)
 
-        # 收集错误详情
-        error_df = df[df['success'] == False]
-        for _, row in error_df.iterrows():
-            summary['error_details'].append({
-                'label': row['label'],
-                'response_code': row['responseCode'],
-                'response_message': row['failureMessage'],
-                'thread_name': row['threadName'],
-                'timestamp': datetime.datetime.fromtimestamp(row['timeStamp'] / 1000).strftime('%Y-%m-%d %H:%M:%S')
-            })
-
-        return summary
\ No newline at end of file
+        return result
\ No newline at end of file
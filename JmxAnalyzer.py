@@ -0,0 +1,246 @@
+import re
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class JmxParseException(Exception): pass
+
+
+# 非GUI运行时仍会消耗压测机CPU/内存的监听器（ResultCollector的guiclass）
+LISTENER_NAMES = {
+    'ViewResultsFullVisualizer': '察看结果树',
+    'StatVisualizer': '聚合报告',
+    'SummaryReport': '汇总报告',
+    'TableVisualizer': '用表格察看结果',
+    'GraphVisualizer': '图形结果',
+    'StatGraphVisualizer': '聚合图',
+    'RespTimeGraphVisualizer': '响应时间图',
+    'AssertionVisualizer': '断言结果',
+    'ComparisonVisualizer': '比较断言可视化器',
+    'SimpleDataWriter': '简单数据写入器',
+}
+
+# 调试元件，运行时会生成大量变量/属性转储
+DEBUG_ELEMENTS = ('DebugSampler', 'DebugPostProcessor')
+
+# BeanShell元件，每次执行都会解释脚本，建议改为JSR223+Groovy
+BEANSHELL_ELEMENTS = ('BeanShellSampler', 'BeanShellPreProcessor', 'BeanShellPostProcessor',
+                      'BeanShellAssertion', 'BeanShellTimer', 'BeanShellListener')
+
+# 线程组
+THREAD_GROUP = 'ThreadGroup'
+SETUP_THREAD_GROUP = 'SetupThreadGroup'
+POST_THREAD_GROUP = 'PostThreadGroup'
+CONCURRENCY_THREAD_GROUP = 'com.blazemeter.jmeter.threads.concurrency.ConcurrencyThreadGroup'
+
+# ${__P(name,default)} / ${__property(name,变量名,default)} 形式的属性引用（__property的第二个参数为保存结果的变量名）
+_PROPERTY_DEFAULT = re.compile(
+    r'^\$\{__(?:P\(\s*[^,)]+\s*,|property\(\s*[^,)]+\s*,\s*[^,)]*\s*,)\s*([^,)]*?)\s*\)\}$')
+
+
+def _resolve_number(value: Optional[str]) -> Optional[float]:
+    """
+    解析数值属性，支持 ${__P(name,default)} 和 ${__property(name,,default)} 取默认值
+    Args:
+        value: 属性文本
+    Returns:
+        Optional[float]: 无法解析时返回None
+    """
+    if value is None:
+        return None
+    value = value.strip()
+    match = _PROPERTY_DEFAULT.match(value)
+    if match:
+        value = match.group(1)
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _prop(element: ET.Element, name: str) -> Optional[str]:
+    """获取元件的直接子属性值（stringProp/intProp/longProp/boolProp）"""
+    for child in element:
+        if child.get('name') == name:
+            return child.text or ''
+    return None
+
+
+class JmxAnalyzer:
+    """
+    JMX静态分析器
+    只解析一次XML，报告会限制压测机吞吐的元件（监听器、调试元件、保存响应数据等），
+    根据线程组估算执行时长和峰值线程数，并可生成禁用这些元件的净化副本
+    示例用法：
+        analyzer = JmxAnalyzer(Path('test.jmx'))
+        analysis = analyzer.analyze()
+        if analysis['findings']:
+            analyzer.write_sanitized(Path('test.sanitized.jmx'))
+    """
+
+    def __init__(self, jmx_file: Path):
+        """
+        解析JMX文件
+        Args:
+            jmx_file: JMX文件路径
+        Raises:
+            JmxParseException: XML解析失败时抛出
+        """
+        self.jmx_file = Path(jmx_file)
+        try:
+            self.tree = ET.parse(self.jmx_file)
+        except (ET.ParseError, OSError) as e:
+            raise JmxParseException(f"解析JMX文件失败 {self.jmx_file}: {e}")
+        self._analysis: Optional[Dict[str, Any]] = None
+        self._disable: List[ET.Element] = []  # 净化时需要禁用的元件
+
+    def _walk(self) -> Iterator[Tuple[ET.Element, bool]]:
+        """
+        遍历测试计划中的所有元件
+        JMX中每个元件后紧跟一个hashTree存放其子元件，父元件禁用时子元件同样不生效
+        Yields:
+            Tuple[ET.Element, bool]: (元件, 是否实际生效)
+        """
+        def walk(hash_tree: ET.Element, parent_enabled: bool):
+            children = list(hash_tree)
+            for i, element in enumerate(children):
+                if element.tag == 'hashTree':
+                    continue
+                enabled = parent_enabled and element.get('enabled', 'true') != 'false'
+                yield element, enabled
+                if i + 1 < len(children) and children[i + 1].tag == 'hashTree':
+                    yield from walk(children[i + 1], enabled)
+
+        root = self.tree.getroot()
+        top = root.find('hashTree')
+        if top is not None:
+            yield from walk(top, True)
+
+    def _thread_group(self, element: ET.Element) -> Dict[str, Any]:
+        """解析线程组的线程数、启动时间和执行时长（秒）"""
+        info = {'name': element.get('testname', ''), 'type': element.tag,
+                'threads': None, 'ramp_s': None, 'duration_s': None}
+        if element.tag == CONCURRENCY_THREAD_GROUP:
+            unit = 60 if (_prop(element, 'Unit') or 'M').upper() == 'M' else 1
+            info['threads'] = _resolve_number(_prop(element, 'TargetLevel'))
+            ramp = _resolve_number(_prop(element, 'RampUp'))
+            hold = _resolve_number(_prop(element, 'Hold'))
+            info['ramp_s'] = ramp * unit if ramp is not None else None
+            if ramp is not None and hold is not None:
+                info['duration_s'] = (ramp + hold) * unit
+            return info
+
+        info['threads'] = _resolve_number(_prop(element, 'ThreadGroup.num_threads'))
+        info['ramp_s'] = _resolve_number(_prop(element, 'ThreadGroup.ramp_time'))
+        if (_prop(element, 'ThreadGroup.scheduler') or '').strip() == 'true':
+            duration = _resolve_number(_prop(element, 'ThreadGroup.duration'))
+            delay = _resolve_number(_prop(element, 'ThreadGroup.delay')) or 0
+            if duration is not None:
+                info['duration_s'] = delay + duration
+        else:
+            # 未启用调度器时执行时长取决于循环次数和响应时间，无法静态估算
+            controller = next((c for c in element if c.get('name') == 'ThreadGroup.main_controller'), None)
+            loops = _resolve_number(_prop(controller, 'LoopController.loops')) if controller is not None else None
+            if loops is not None and loops < 0:
+                info['unbounded'] = True  # 无限循环且没有调度器
+        return info
+
+    def analyze(self) -> Dict[str, Any]:
+        """
+        分析测试计划
+        Returns:
+            Dict: 包含以下字段
+                findings: 会限制压测机吞吐的元件列表（kind、element、name、message、sanitizable）
+                thread_groups: 生效的线程组信息
+                peak_threads: 估算的峰值线程数，无法估算时为None
+                estimated_duration_s: 估算的执行时长（秒），无法估算时为None
+        """
+        if self._analysis is not None:
+            return self._analysis
+
+        findings = []
+        thread_groups = []
+        serialize = False
+
+        def add(kind: str, element: ET.Element, message: str, sanitizable: bool):
+            findings.append({'kind': kind, 'element': element.get('testclass', element.tag),
+                             'name': element.get('testname', ''), 'message': message,
+                             'sanitizable': sanitizable})
+            if sanitizable:
+                self._disable.append(element)
+
+        for element, enabled in self._walk():
+            if not enabled:
+                continue
+            tag = element.tag
+            if tag == 'TestPlan':
+                serialize = (_prop(element, 'TestPlan.serialize_threadgroups') or '').strip() == 'true'
+            elif tag in (THREAD_GROUP, SETUP_THREAD_GROUP, POST_THREAD_GROUP, CONCURRENCY_THREAD_GROUP):
+                thread_groups.append(self._thread_group(element))
+            elif tag == 'ResultCollector':
+                guiclass = element.get('guiclass', '')
+                label = LISTENER_NAMES.get(guiclass, guiclass)
+                add('listener', element, f"监听器（{label}）在非GUI模式下仍会处理每个采样", True)
+                save_config = element.find("objProp[name='saveConfig']/value")
+                if save_config is not None and (save_config.findtext('responseData') or '') == 'true':
+                    add('save_response_data', element, "监听器保存响应数据，会显著增加内存和磁盘IO", True)
+            elif tag in DEBUG_ELEMENTS:
+                add('debug', element, "调试元件会在每次执行时转储所有变量", True)
+            elif tag in BEANSHELL_ELEMENTS:
+                add('beanshell', element, "BeanShell每次执行都解释脚本，建议改用JSR223+Groovy", False)
+
+        # 同一元件只禁用一次
+        self._disable = list({id(e): e for e in self._disable}.values())
+
+        main_groups = [g for g in thread_groups if g['type'] in (THREAD_GROUP, CONCURRENCY_THREAD_GROUP)]
+        other_groups = [g for g in thread_groups if g not in main_groups]
+        self._analysis = {
+            'findings': findings,
+            'thread_groups': thread_groups,
+            'peak_threads': self._peak_threads(main_groups, other_groups, serialize),
+            'estimated_duration_s': self._estimate_duration(main_groups, other_groups, serialize),
+        }
+        return self._analysis
+
+    @staticmethod
+    def _peak_threads(main_groups: List[Dict], other_groups: List[Dict], serialize: bool) -> Optional[int]:
+        """估算峰值线程数：普通线程组并行（或串行）执行，setUp/tearDown线程组单独执行"""
+        threads = [g['threads'] for g in main_groups]
+        if any(t is None for t in threads):
+            return None
+        peak = (max(threads, default=0) if serialize else sum(threads))
+        peak = max([peak] + [g['threads'] or 0 for g in other_groups])
+        return int(peak) if peak else None
+
+    @staticmethod
+    def _estimate_duration(main_groups: List[Dict], other_groups: List[Dict], serialize: bool) -> Optional[float]:
+        """估算执行时长：任一线程组无法估算时返回None"""
+        durations = [g['duration_s'] for g in main_groups]
+        if not durations or any(d is None for d in durations):
+            return None
+        total = sum(durations) if serialize else max(durations)
+        return total + sum(g['duration_s'] or 0 for g in other_groups)
+
+    def write_sanitized(self, output_file: Path) -> int:
+        """
+        写出禁用高开销元件后的测试计划副本（原文件不变）
+        Args:
+            output_file: 输出文件路径，应与原文件位于同一目录以保证相对路径（如CSV数据文件）有效
+        Returns:
+            int: 被禁用的元件数量
+        """
+        self.analyze()
+        original = [(element, element.get('enabled')) for element in self._disable]
+        try:
+            for element in self._disable:
+                element.set('enabled', 'false')
+            self.tree.write(output_file, encoding='UTF-8', xml_declaration=True)
+        finally:
+            # 恢复内存中的XML，保证analyze结果与原文件一致
+            for element, enabled in original:
+                if enabled is None:
+                    element.attrib.pop('enabled', None)
+                else:
+                    element.set('enabled', enabled)
+        return len(self._disable)
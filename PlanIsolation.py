@@ -0,0 +1,160 @@
+import math
+import os
+import queue
+import shutil
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import psutil  # 可选依赖，用于在没有sysconf的平台上获取物理内存
+except ImportError:
+    psutil = None
+
+# JMeter启动脚本的默认堆大小为1g，按计划线程数在此基础上增加
+BASE_HEAP_MB = 1024
+HEAP_PER_THREAD_MB = 2
+MIN_HEAP_MB = 512
+HEAP_ALIGN_MB = 256
+# 并行计划的堆合计不超过物理内存的比例（其余留给线程栈、元空间和操作系统）
+MAX_HEAP_FRACTION = 0.75
+METASPACE = '-XX:MaxMetaspaceSize=256m'
+GC_ALGO = '-XX:+UseG1GC -XX:MaxGCPauseMillis=100 -XX:G1ReservePercent=20'  # 与JMeter默认一致
+
+
+def isolation_available() -> bool:
+    """当前平台是否支持为子进程设置CPU亲和性（Linux，需要util-linux的taskset）"""
+    return hasattr(os, 'sched_setaffinity') and shutil.which('taskset') is not None
+
+
+def available_cpus() -> List[int]:
+    """当前进程可用的CPU编号"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def physical_memory_mb() -> Optional[int]:
+    """物理内存大小（MB），无法获取时返回None"""
+    if hasattr(os, 'sysconf'):
+        try:
+            return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // (1024 * 1024)
+        except (ValueError, OSError):
+            pass
+    if psutil is not None:
+        return psutil.virtual_memory().total // (1024 * 1024)
+    return None
+
+
+def format_cpus(cpus: Sequence[int]) -> str:
+    """将CPU编号列表格式化为 0-3,8 的形式"""
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ','.join(f'{a}-{b}' if a != b else str(a) for a, b in ranges)
+
+
+class CpuAllocator:
+    """
+    CPU集合分配器
+    将可用CPU划分为互不重叠的若干组，每个并行执行的计划独占一组，计划结束后归还
+    组数不超过CPU数，各组之间没有重叠
+    示例用法：
+        allocator = CpuAllocator(available_cpus(), slots=4)
+        cpus = allocator.acquire()
+        try:
+            ...
+        finally:
+            allocator.release(cpus)
+    """
+
+    def __init__(self, cpus: Sequence[int], slots: int):
+        """
+        划分CPU集合
+        Args:
+            cpus: 可用CPU编号
+            slots: 组数（即并行执行的计划数），超过CPU数时按CPU数划分
+        """
+        cpus = sorted(cpus)
+        self.slots = max(1, min(slots, len(cpus)))
+        # 尽量均分，相邻编号的CPU分在同一组
+        size, extra = divmod(len(cpus), self.slots)
+        self.cpu_sets, start = [], 0
+        for i in range(self.slots):
+            end = start + size + (1 if i < extra else 0)
+            self.cpu_sets.append(cpus[start:end])
+            start = end
+        self._free: 'queue.Queue[List[int]]' = queue.Queue()
+        for cpu_set in self.cpu_sets:
+            self._free.put(cpu_set)
+
+    def acquire(self) -> List[int]:
+        """取得一组CPU（没有空闲组时阻塞）"""
+        return self._free.get()
+
+    def release(self, cpus: List[int]):
+        """归还一组CPU"""
+        self._free.put(cpus)
+
+
+def pin_command(command: List[str], cpus: Optional[Sequence[int]]) -> List[str]:
+    """
+    为命令加上taskset前缀，将其绑定到指定CPU
+    taskset设置亲和性后exec目标命令（进程号不变），JMeter启动脚本及JVM子进程均继承该亲和性；
+    不使用Popen的preexec_fn，它在多线程进程中fork后执行Python代码，可能在exec之前死锁
+    Args:
+        command: 原命令
+        cpus: 绑定的CPU，为空时原样返回
+    Returns:
+        List[str]: 命令
+    """
+    if not cpus:
+        return command
+    return ['taskset', '-c', format_cpus(cpus)] + list(command)
+
+
+def heap_size_mb(peak_threads: Optional[int], concurrent: int = 1) -> Optional[int]:
+    """
+    根据计划的峰值线程数估算JMeter堆大小
+    Args:
+        peak_threads: 峰值线程数，为None时返回None（使用JMeter默认值）
+        concurrent: 并行执行的计划数，用于按物理内存限制上限
+    Returns:
+        Optional[int]: 堆大小（MB），按HEAP_ALIGN_MB向上取整
+    """
+    if not peak_threads:
+        return None
+    heap = BASE_HEAP_MB + peak_threads * HEAP_PER_THREAD_MB
+    heap = math.ceil(heap / HEAP_ALIGN_MB) * HEAP_ALIGN_MB
+    memory = physical_memory_mb()
+    if memory:
+        limit = int(memory * MAX_HEAP_FRACTION / max(concurrent, 1)) // HEAP_ALIGN_MB * HEAP_ALIGN_MB
+        heap = min(heap, max(limit, MIN_HEAP_MB))
+    return max(heap, MIN_HEAP_MB)
+
+
+def jvm_env(heap_mb: Optional[int] = None, cpus: Optional[Sequence[int]] = None,
+            base_env: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    生成JMeter进程的环境变量
+    JMeter启动脚本（jmeter / jmeter.bat）读取HEAP、GC_ALGO和JVM_ARGS，这里按计划设置，不修改当前进程的环境
+    Args:
+        heap_mb: 堆大小（MB），为None时使用JMeter默认值
+        cpus: 绑定的CPU，为None时不限制JVM可见的处理器数
+        base_env: 基础环境变量，默认为当前进程的环境
+    Returns:
+        Dict: 环境变量
+    """
+    env = dict(os.environ if base_env is None else base_env)
+    # 设置Java和JMeter的编码环境
+    env['JAVA_TOOL_OPTIONS'] = '-Dfile.encoding=UTF-8'
+    env['JMETER_OPTS'] = '-Dfile.encoding=UTF-8'
+    if heap_mb:
+        env['HEAP'] = f'-Xms{heap_mb}m -Xmx{heap_mb}m {METASPACE}'  # 初始堆等于最大堆，避免扩容停顿
+    if cpus:
+        # JVM按可见处理器数确定GC线程数，绑定CPU后与之保持一致，避免GC线程争抢
+        count = len(cpus)
+        env['GC_ALGO'] = f'{GC_ALGO} -XX:ParallelGCThreads={count} -XX:ConcGCThreads={max(1, count // 4)}'
+        env['JVM_ARGS'] = f"{env.get('JVM_ARGS', '')} -XX:ActiveProcessorCount={count}".strip()
+    return env
@@ -0,0 +1,203 @@
+import contextlib
+import cProfile
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import psutil  # 可选依赖，用于读取当前进程内存
+except ImportError:
+    psutil = None
+
+try:
+    import resource  # 仅类Unix系统可用
+except ImportError:
+    resource = None
+
+
+def _process_peak_rss_mb() -> Optional[float]:
+    """
+    获取当前进程启动以来的内存峰值（MB）
+    该值只增不减，反映的是截至调用时整个进程的峰值，不能归属到某个阶段
+    Returns:
+        Optional[float]: 无法获取时返回None
+    """
+    if resource is not None:
+        # Linux下ru_maxrss单位为KB，macOS为字节
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss / 1024 / 1024 if os.uname().sysname == 'Darwin' else maxrss / 1024
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        peak = getattr(info, 'peak_wset', None)  # Windows提供峰值工作集
+        return (peak or info.rss) / 1024 / 1024
+    return None
+
+
+class PhaseProfiler:
+    """
+    流水线阶段性能分析器
+    记录各阶段/各测试计划的耗时区间及区间结束时的进程内存峰值，
+    可导出Chrome trace-event JSON（chrome://tracing 或 Perfetto 打开），
+    并可对指定阶段启用cProfile（每个区间单独保存一个.prof文件）
+    示例用法：
+        profiler = PhaseProfiler(profile_phases=['parse_results'], output_dir=result_dir)
+        with profiler.span('run_all_tests'):
+            ...
+        profiler.export_chrome_trace(result_dir / 'trace.json')
+    """
+
+    def __init__(self, enabled: bool = True, profile_phases: Optional[Iterable[str]] = None,
+                 output_dir: Optional[Path] = None):
+        """
+        初始化分析器
+        Args:
+            enabled: 是否启用，关闭时span为空操作
+            profile_phases: 需要cProfile的阶段名称
+            output_dir: cProfile结果（.prof）输出目录
+        """
+        self.enabled = enabled
+        self.profile_phases = set(profile_phases or [])
+        self.output_dir = Path(output_dir) if output_dir else None
+        self._events: List[Dict[str, Any]] = []  # trace事件列表
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()  # 时间基准
+        self._pid = os.getpid()
+        self._profiling = threading.local()  # 每个线程同一时间只能有一个活动的cProfile
+        self._profile_files: Dict[str, int] = {}  # .prof文件名 -> 使用次数
+
+    @contextlib.contextmanager
+    def span(self, name: str, category: str = 'phase', **args):
+        """
+        记录一个耗时区间
+        Args:
+            name: 区间名称（阶段名或 plan:<计划名>）
+            category: 类别（phase/plan/jmeter等）
+            **args: 附加到trace事件的参数
+        """
+        if not self.enabled:
+            yield
+            return
+
+        profiler = self._start_cprofile(name, args)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            if profiler is not None:
+                self._stop_cprofile(profiler, name, args)
+            peak_rss = _process_peak_rss_mb()
+            event = {
+                'name': name,
+                'cat': category,
+                'ph': 'X',  # complete事件
+                'ts': (start - self._origin) * 1e6,  # 微秒
+                'dur': (end - start) * 1e6,
+                'pid': self._pid,
+                'tid': threading.get_ident(),
+                'args': dict(args, process_peak_rss_mb=peak_rss),
+            }
+            with self._lock:
+                self._events.append(event)
+
+    def _start_cprofile(self, name: str, args: Dict[str, Any]) -> Optional[cProfile.Profile]:
+        """
+        对指定阶段启动cProfile
+        cProfile只分析调用线程，不同线程中的并发区间各自分析；
+        同一线程内的嵌套区间，以及解释器只允许一个全局分析器时（Python 3.12+）的并发区间不分析，
+        并在trace事件中标记cprofile_skipped
+        """
+        if name not in self.profile_phases:
+            return None
+        if getattr(self._profiling, 'active', False):
+            args['cprofile_skipped'] = True
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # 其他线程已启用分析器
+            args['cprofile_skipped'] = True
+            return None
+        self._profiling.active = True
+        return profiler
+
+    def _stop_cprofile(self, profiler: cProfile.Profile, name: str, args: Dict[str, Any]):
+        """
+        停止cProfile并保存结果
+        文件名为profile_<阶段名>[_<计划名>].prof，同名区间再次出现时追加序号，不覆盖之前的结果
+        """
+        profiler.disable()
+        self._profiling.active = False
+        if self.output_dir is None:
+            return
+        parts = [name] + ([str(args['plan'])] if 'plan' in args else [])
+        stem = '_'.join(''.join(c if c.isalnum() or c in '-_' else '_' for c in part) for part in parts)
+        with self._lock:
+            count = self._profile_files.get(stem, 0) + 1
+            self._profile_files[stem] = count
+        if count > 1:
+            stem = f'{stem}_{count}'
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        profile_file = self.output_dir / f'profile_{stem}.prof'
+        profiler.dump_stats(str(profile_file))
+        args['cprofile'] = profile_file.name
+
+    @property
+    def events(self) -> List[Dict[str, Any]]:
+        """已记录的trace事件副本"""
+        with self._lock:
+            return list(self._events)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """
+        按区间名称汇总
+        Returns:
+            List[Dict]: 每项包含name、category、count、total_ms、max_ms、process_peak_rss_mb
+            （该阶段各区间结束时进程内存峰值的最大值），按首次出现顺序排列
+        """
+        rows: Dict[str, Dict[str, Any]] = {}
+        for event in sorted(self.events, key=lambda e: e['ts']):
+            row = rows.setdefault(event['name'], {
+                'name': event['name'],
+                'category': event['cat'],
+                'count': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'process_peak_rss_mb': None,
+            })
+            dur_ms = event['dur'] / 1000
+            row['count'] += 1
+            row['total_ms'] += dur_ms
+            row['max_ms'] = max(row['max_ms'], dur_ms)
+            rss = event['args'].get('process_peak_rss_mb')
+            if rss is not None:
+                row['process_peak_rss_mb'] = max(row['process_peak_rss_mb'] or 0, rss)
+        return list(rows.values())
+
+    def export_chrome_trace(self, trace_file: Path) -> Path:
+        """
+        导出Chrome trace-event格式的JSON文件
+        Args:
+            trace_file: 输出文件路径
+        Returns:
+            Path: 输出文件路径
+        """
+        trace_file = Path(trace_file)
+        trace_file.parent.mkdir(parents=True, exist_ok=True)
+        main_tid = threading.main_thread().ident
+        threads = {main_tid: 'main'}
+        for event in self.events:
+            if event['tid'] not in threads:
+                threads[event['tid']] = f'worker-{len(threads)}'
+        # 为线程添加可读名称
+        metadata = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': self._pid, 'tid': tid, 'args': {'name': thread_name}}
+            for tid, thread_name in threads.items()
+        ]
+        with open(trace_file, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': metadata + self.events, 'displayTimeUnit': 'ms'},
+                      f, ensure_ascii=False)
+        return trace_file
@@ -1,22 +1,32 @@
 import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Mapping, Optional
 from pathlib import Path
 import plotly.graph_objects as go  # 生成图表所需
 from jinja2 import Template  # HTML模板渲染
 from EmailSender import EmailSender
+from Profiler import PhaseProfiler
+from Config import DEFAULT_CONFIG, missing_email_settings
+from ChangePoint import TOTAL_LABEL
+from ResultModel import RunResults
 
 
 class ReportGenerator:
-    def __init__(self, results: Dict[str, Any], output_dir: Path):
+    def __init__(self, results: Mapping[str, Any], output_dir: Path, profiler: Optional[PhaseProfiler] = None,
+                 email_config: Optional[Dict[str, Any]] = None):
         """
         初始化报告生成器
         Args:
-            results: 所有测试结果
+            results: 所有测试结果（RunResults，或 计划名称 -> PlanResult/结果字典）
             output_dir: 输出目录
+            profiler: 阶段性能分析器，为None时不记录
+            email_config: 邮件配置（sender_email、sender_password、recipient_email、smtp_server、smtp_port），
+                为None时使用Config中的默认配置
         """
-        self.results = results  # 存储测试结果数据
+        self.results = results if isinstance(results, RunResults) else RunResults(results)  # 存储测试结果数据
         self.output_dir = output_dir  # 设置报告输出目录
         self.timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')  # 生成时间戳
+        self.profiler = profiler or PhaseProfiler(enabled=False)  # 阶段性能分析器
+        self.email_config = email_config or DEFAULT_CONFIG  # 邮件配置
 
     def generate_charts(self) -> Dict[str, str]:
         """
@@ -25,15 +35,14 @@ class ReportGenerator:
             Dict: 包含所有图表HTML的字典
         """
         charts = {}  # 初始化图表字典
+        totals = self.results.totals()  # 跨计划合计
+        plans = self.results.plan_table()  # 各计划汇总指标
 
         # 生成总体成功率饼图
-        total_success = sum(r['successful_requests'] for r in self.results.values())  # 计算总成功请求数
-        total_failed = sum(r['failed_requests'] for r in self.results.values())  # 计算总失败请求数
-
         fig_success_rate = go.Figure(data=[
             go.Pie(
                 labels=['成功', '失败'],
-                values=[total_success, total_failed],
+                values=[totals['total_success'], totals['total_failed']],
                 hole=.3,  # 设置饼图中心空洞大小
                 marker_colors=['#00C851', '#ff4444']  # 设置颜色
             )
@@ -47,7 +56,7 @@ class ReportGenerator:
 
         # 生成各系统响应时间对比图
         systems = list(self.results.keys())  # 获取所有系统名称
-        avg_response_times = [r['average_response_time'] for r in self.results.values()]  # 获取平均响应时间
+        avg_response_times = plans['average_response_time'].tolist()  # 获取平均响应时间
 
         fig_response_time = go.Figure(data=[
             go.Bar(
@@ -67,7 +76,7 @@ class ReportGenerator:
         charts['response_time_comparison'] = fig_response_time.to_html(full_html=False)  # 将图表转为HTML
 
         # 生成TPS对比图
-        tps_values = [r['tps'] for r in self.results.values()]  # 获取各系统TPS值
+        tps_values = plans['tps'].tolist()  # 获取各系统TPS值
 
         fig_tps = go.Figure(data=[
             go.Bar(
@@ -86,12 +95,68 @@ class ReportGenerator:
         )
         charts['tps_comparison'] = fig_tps.to_html(full_html=False)  # 将图表转为HTML
 
+        # 生成各系统的时间线图（标出突变后的状态区间）
+        for system_name, result in self.results.items():
+            timeline = result.get('timeline')
+            if timeline and len(timeline['timeline']['t']) > 1:
+                charts[f'timeline_{system_name}'] = self._timeline_chart(timeline)
+
         return charts  # 返回所有图表
 
-    def generate_html_report(self):
-        """生成HTML报告"""
+    @staticmethod
+    def _timeline_chart(timeline: Dict[str, Any]) -> str:
+        """
+        生成总体响应时间与吞吐量时间线图
+        总体序列的突变区间按劣化（红）/改善（绿）着色，单个事务的突变以虚线标出
+        Args:
+            timeline: parse_results中的timeline（见ChangePoint.analyze_timeline）
+        Returns:
+            str: 图表HTML
+        """
+        series = timeline['timeline']
+        minutes = [t / 60 for t in series['t']]  # 横轴以分钟显示
+
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=minutes, y=series['latency'], name='平均响应时间(ms)',
+                                 line=dict(color='#3366cc')))
+        fig.add_trace(go.Scatter(x=minutes, y=series['throughput'], name='吞吐量(/s)', yaxis='y2',
+                                 line=dict(color='#00C851')))
+
+        marked = set()
+        for change in timeline['change_points']:
+            start = change['offset_s'] / 60
+            if change['label'] == TOTAL_LABEL:
+                fig.add_vrect(
+                    x0=start, x1=change['end_offset_s'] / 60,
+                    fillcolor='#ff4444' if change['degraded'] else '#00C851', opacity=0.12, line_width=0,
+                    annotation_text=f"{change['metric_name']} {change['change_pct']:+.0f}%"
+                    if change['change_pct'] is not None else change['metric_name'],
+                    annotation_position='top left',
+                )
+            elif change['degraded'] and start not in marked:
+                marked.add(start)
+                fig.add_vline(x=start, line_dash='dot', line_color='#ffbb33', opacity=0.6)
+
+        fig.update_layout(
+            title=f"时间线（采样间隔 {timeline['interval_s']}s）",
+            xaxis_title='测试时间(分钟)',
+            yaxis=dict(title='响应时间(ms)'),
+            yaxis2=dict(title='吞吐量(/s)', overlaying='y', side='right'),
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+        )
+        return fig.to_html(full_html=False, include_plotlyjs=False)  # plotly.js已随总体图表引入
+
+    def generate_html_report(self, send_email: bool = True) -> Path:
+        """
+        生成HTML报告
+        Args:
+            send_email: 是否将报告通过邮件发送
+        Returns:
+            Path: 报告文件路径
+        """
         # 生成图表
-        charts = self.generate_charts()  # 调用方法生成所有图表
+        with self.profiler.span('generate_charts'):
+            charts = self.generate_charts()  # 调用方法生成所有图表
 
         # 读取HTML模板
         template = self._get_html_template()  # 获取HTML模板
@@ -99,43 +164,59 @@ class ReportGenerator:
         # 生成报告文件路径
         report_file = self.output_dir / f'test_report_{self.timestamp}.html'  # 设置报告文件路径
 
-        # 渲染HTML
-        html_content = template.render(
-            timestamp=self.timestamp,  # 时间戳
-            results=self.results,  # 测试结果
-            charts=charts,  # 图表数据
-            total_systems=len(self.results),  # 系统总数
-            total_requests=sum(r['total_requests'] for r in self.results.values()),  # 总请求数
-            total_success=sum(r['successful_requests'] for r in self.results.values()),  # 总成功数
-            total_failed=sum(r['failed_requests'] for r in self.results.values()),  # 总失败数
-            overall_avg_response_time=sum(r['average_response_time'] for r in self.results.values()) / len(
-                self.results) if self.results else 0  # 平均响应时间
-        )
+        # 渲染HTML（阶段耗时表包含渲染之前已完成的各阶段）
+        totals = self.results.totals()  # 系统总数、总请求数、总成功数、总失败数、平均响应时间
+        with self.profiler.span('render_template'):
+            html_content = template.render(
+                timestamp=self.timestamp,  # 时间戳
+                results=self.results,  # 测试结果（PlanResult兼容原结果字典的访问方式）
+                charts=charts,  # 图表数据
+                profile_summary=self.profiler.summary(),  # 阶段耗时汇总
+                **totals
+            )
 
         # 写入文件
         with open(report_file, 'w', encoding='utf-8') as f:  # 打开文件准备写入
             f.write(html_content)  # 写入HTML内容
 
+        print(f"HTML汇总报告已生成: {report_file}")
+
+        # 发送邮件（带附件）
+        if send_email:
+            self._send_email_notification(report_file)
+
+        return report_file
+
+    def _send_email_notification(self, report_file: Path) -> bool:
+        """
+        发送邮件通知
+        Args:
+            report_file: 报告文件路径
+        Returns:
+            bool: 是否发送成功
+        """
+        missing = missing_email_settings(self.email_config)
+        if missing:
+            print(f"邮件未配置（缺少 {', '.join(missing)}），跳过发送")
+            return False
+
         # 初始化邮件发送器
         sender = EmailSender(
-            sender_email="2343434344@163.com",  # 发件人邮箱
-            sender_password="EBiNKCD4TBn19JDJx"  # 你的SMTP授权码
+            sender_email=self.email_config['sender_email'],  # 发件人邮箱
+            sender_password=self.email_config['sender_password'],  # SMTP授权码
+            smtp_server=self.email_config['smtp_server'],
+            smtp_port=self.email_config['smtp_port']
         )
 
         # 发送邮件（带附件）
-        success = sender.send_email(
-            recipient_email="1229334343@qq.com",
-            subject="自动化性能测试报告",
-            body="自动化性能测试报告每日自动执行，详细报告数据请查看附件",
-            attachment_path=report_file
-        )
+        with self.profiler.span('send_email'):
+            success = sender.send_report(self.email_config['recipient_email'], report_file)
 
         if success:
             print("邮件发送任务已执行成功")
         else:
             print("邮件发送失败")
-
-        print(f"HTML汇总报告已生成: {report_file}")
+        return success
 
     def _get_html_template(self) -> Template:
         """
@@ -367,6 +448,9 @@ class ReportGenerator:
                     <div class="card-header">
                         <h5 class="mb-0">
                             <i class="fas fa-server me-2"></i>{{ system_name }}
+                            {% if result.generator and result.generator.summary.saturated %}
+                            <span class="status-badge status-error ms-2">压测机饱和</span>
+                            {% endif %}
                         </h5>
                     </div>
                     <div class="card-body">
@@ -396,6 +480,84 @@ class ReportGenerator:
                                 </div>
                             </div>
                         </div>
+                        <!-- 压测机自监控 -->
+                        {% if result.generator and result.generator.summary.samples %}
+                        {% set gen = result.generator.summary %}
+                        {% if gen.saturated %}
+                        <div class="alert alert-danger">
+                            <h6><i class="fas fa-exclamation-circle me-2"></i>压测机在测试期间处于饱和状态，本次结果可能反映的是压测机瓶颈而非被测系统性能</h6>
+                            <ul class="mb-0">
+                                {% for reason in gen.reasons %}
+                                <li>{{ reason }}</li>
+                                {% endfor %}
+                            </ul>
+                        </div>
+                        {% endif %}
+                        <p class="text-muted small">
+                            压测机（{{ result.generator.cpu_count }}核）：JMeter进程CPU 平均 {{ "%.0f"|format(gen.avg_cpu_percent) }}% / 峰值 {{ "%.0f"|format(gen.max_cpu_percent) }}%，
+                            内存峰值 {{ "%.0f"|format(gen.max_rss_mb) }}MB，线程数峰值 {{ gen.max_threads }}{% if gen.max_host_cpu_percent is not none %}，主机CPU峰值 {{ "%.0f"|format(gen.max_host_cpu_percent) }}%{% endif %}
+                        </p>
+                        {% endif %}
+                        {% if result.isolation %}
+                        <p class="text-muted small">
+                            JVM堆：{{ "%dMB"|format(result.isolation.heap_mb) if result.isolation.heap_mb else '默认' }}，
+                            绑定CPU：{{ result.isolation.cpus|join(',') if result.isolation.cpus else '不限' }}
+                        </p>
+                        {% endif %}
+                        <!-- 预检发现的高开销元件 -->
+                        {% if result.preflight and result.preflight.findings %}
+                        <div class="alert alert-warning">
+                            <h6><i class="fas fa-exclamation-triangle me-2"></i>预检发现 {{ result.preflight.findings|length }} 个会限制压测机吞吐的元件{% if result.preflight.sanitized %}（本次已使用禁用这些元件的副本执行）{% endif %}</h6>
+                            <ul class="mb-0">
+                                {% for finding in result.preflight.findings %}
+                                <li>{{ finding.element }}「{{ finding.name }}」{{ finding.message }}</li>
+                                {% endfor %}
+                            </ul>
+                        </div>
+                        {% endif %}
+                        <!-- 时间线与突变点 -->
+                        {% if charts['timeline_' ~ system_name] %}
+                        <div class="chart-container">
+                            {{ charts['timeline_' ~ system_name] | safe }}
+                        </div>
+                        {% endif %}
+                        {% if result.timeline and result.timeline.change_points %}
+                        <div class="mt-3 mb-4">
+                            <h6><i class="fas fa-wave-square me-2"></i>性能突变（{{ result.timeline.change_points|length }}）</h6>
+                            <div class="error-details">
+                                <table class="table table-sm">
+                                    <thead>
+                                        <tr>
+                                            <th>开始时间</th>
+                                            <th>事务名称</th>
+                                            <th>指标</th>
+                                            <th>变化前</th>
+                                            <th>变化后</th>
+                                            <th>变化幅度</th>
+                                            <th>持续</th>
+                                        </tr>
+                                    </thead>
+                                    <tbody>
+                                        {% for change in result.timeline.change_points %}
+                                        <tr>
+                                            <td>{{ change.time }}</td>
+                                            <td>{{ change.label }}</td>
+                                            <td>{{ change.metric_name }}</td>
+                                            <td>{{ "%.2f"|format(change.before) }}</td>
+                                            <td>{{ "%.2f"|format(change.after) }}</td>
+                                            <td>
+                                                <span class="status-badge {{ 'status-error' if change.degraded else 'status-success' }}">
+                                                    {% if change.change_pct is not none %}{{ "%+.1f"|format(change.change_pct) }}%{% else %}{{ '劣化' if change.degraded else '改善' }}{% endif %}
+                                                </span>
+                                            </td>
+                                            <td>{{ "%.1f"|format((change.end_offset_s - change.offset_s) / 60) }}分钟</td>
+                                        </tr>
+                                        {% endfor %}
+                                    </tbody>
+                                </table>
+                            </div>
+                        </div>
+                        {% endif %}
                         <!-- 事务详情 -->
                         <div class="table-responsive">
                             <table class="table table-hover">
@@ -473,6 +635,46 @@ class ReportGenerator:
             </div>
         </div>
         {% endfor %}
+        <!-- 阶段耗时 -->
+        {% if profile_summary %}
+        <div class="row mt-4">
+            <div class="col">
+                <div class="card animate-on-scroll">
+                    <div class="card-header">
+                        <h5 class="mb-0"><i class="fas fa-stopwatch me-2"></i>阶段耗时</h5>
+                    </div>
+                    <div class="card-body">
+                        <div class="table-responsive">
+                            <table class="table table-sm table-hover">
+                                <thead>
+                                    <tr>
+                                        <th>阶段</th>
+                                        <th>类别</th>
+                                        <th>次数</th>
+                                        <th>总耗时</th>
+                                        <th>最大耗时</th>
+                                        <th title="进程启动以来的内存峰值（截至该阶段结束），不是该阶段自身的内存占用">进程内存峰值</th>
+                                    </tr>
+                                </thead>
+                                <tbody>
+                                    {% for phase in profile_summary %}
+                                    <tr>
+                                        <td>{{ phase.name }}</td>
+                                        <td>{{ phase.category }}</td>
+                                        <td>{{ phase.count }}</td>
+                                        <td>{{ "%.2f"|format(phase.total_ms / 1000) }}s</td>
+                                        <td>{{ "%.2f"|format(phase.max_ms / 1000) }}s</td>
+                                        <td>{% if phase.process_peak_rss_mb is not none %}{{ "%.1f"|format(phase.process_peak_rss_mb) }}MB{% else %}-{% endif %}</td>
+                                    </tr>
+                                    {% endfor %}
+                                </tbody>
+                            </table>
+                        </div>
+                    </div>
+                </div>
+            </div>
+        </div>
+        {% endif %}
     </div>
 </body>
 </html>
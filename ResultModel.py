@@ -0,0 +1,458 @@
+import datetime
+import json
+from collections.abc import Mapping, MutableMapping, Sequence
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+# 事务统计表：每行一个事务，label为字符串表中的编号
+TRANSACTION_DTYPE = np.dtype([
+    ('label', np.int32),
+    ('count', np.int64),
+    ('success', np.int64),
+    ('fail', np.int64),
+    ('elapsed_sum', np.float64),
+    ('min', np.float64),
+    ('max', np.float64),
+])
+
+# 错误明细表：字符串列均为字符串表中的编号，timestamp为毫秒
+ERROR_DTYPE = np.dtype([
+    ('label', np.int32),
+    ('response_code', np.int32),
+    ('message', np.int32),
+    ('thread', np.int32),
+    ('timestamp', np.int64),
+])
+
+# 计划汇总字段（按原结果字典的顺序）
+SUMMARY_FIELDS = ('total_requests', 'successful_requests', 'failed_requests',
+                  'average_response_time', 'min_response_time', 'max_response_time', 'tps', 'error_rate')
+
+PLAN_DTYPE = np.dtype([(name, np.int64 if name.endswith('requests') else np.float64) for name in SUMMARY_FIELDS])
+
+_STRING_COLUMNS = {'transactions': ('label',), 'errors': ('label', 'response_code', 'message', 'thread')}
+
+
+def _json_default(o):
+    """numpy标量转换为Python内置类型"""
+    return o.item() if hasattr(o, 'item') else str(o)
+
+
+class StringTable:
+    """字符串表：相同的事务名称、响应码、错误信息只保存一份，各表中以int32编号引用"""
+
+    __slots__ = ('_index', 'values')
+
+    def __init__(self, values: Iterable[str] = ()):
+        self._index: Dict[str, int] = {}
+        self.values: List[str] = []
+        for value in values:
+            self.intern(value)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, index: int) -> str:
+        return self.values[index]
+
+    def intern(self, value: str) -> int:
+        """取得字符串的编号，不存在时追加"""
+        index = self._index.get(value)
+        if index is None:
+            index = self._index[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+    def intern_many(self, values: Iterable[Any]) -> np.ndarray:
+        """批量取得编号（通常传入去重后的值，如pandas.factorize的uniques）"""
+        return np.fromiter((self.intern(_to_str(v)) for v in values), dtype=np.int32)
+
+
+def _pack_strings(values: List[str]):
+    """
+    将字符串列表编码为一个UTF-8字节块和偏移数组（第i个字符串为blob[offsets[i]:offsets[i+1]]）
+    不使用定长的Unicode数组，避免所有字符串按最长的一个补齐
+    """
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack_strings(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    """_pack_strings的逆操作"""
+    raw = blob.tobytes()
+    bounds = offsets.tolist()
+    return [raw[start:end].decode('utf-8') for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def _to_str(value: Any) -> str:
+    """JTL中的空值（NaN）记为空字符串"""
+    if value is None or (isinstance(value, float) and value != value):
+        return ''
+    return str(value)
+
+
+class TransactionsView(Mapping):
+    """事务统计的字典视图：事务名称 -> 原结果字典格式的统计"""
+
+    __slots__ = ('_plan', '_rows')
+
+    def __init__(self, plan: 'PlanResult'):
+        self._plan = plan
+        self._rows: Optional[Dict[str, int]] = None
+
+    def _index(self) -> Dict[str, int]:
+        if self._rows is None:
+            strings = self._plan.strings
+            self._rows = {strings[label]: i for i, label in enumerate(self._plan.transaction_table['label'].tolist())}
+        return self._rows
+
+    def __len__(self) -> int:
+        return len(self._plan.transaction_table)
+
+    def __iter__(self) -> Iterator[str]:
+        strings = self._plan.strings
+        return (strings[label] for label in self._plan.transaction_table['label'].tolist())
+
+    def __getitem__(self, label: str) -> Dict[str, Any]:
+        row = self._plan.transaction_table[self._index()[label]]
+        count = int(row['count'])
+        return {
+            'count': count,
+            'success': int(row['success']),
+            'fail': int(row['fail']),
+            'avg_response_time': float(row['elapsed_sum']) / count if count else 0.0,
+            'min_response_time': float(row['min']),
+            'max_response_time': float(row['max']),
+            'error_rate': int(row['fail']) / count * 100 if count else 0,
+        }
+
+
+class ErrorDetailsView(Sequence):
+    """错误明细的列表视图：按需生成原结果字典格式的错误记录"""
+
+    __slots__ = ('_plan',)
+
+    def __init__(self, plan: 'PlanResult'):
+        self._plan = plan
+
+    def __len__(self) -> int:
+        return len(self._plan.error_table)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        row = self._plan.error_table[index]
+        strings = self._plan.strings
+        return {
+            'label': strings[row['label']],
+            'response_code': strings[row['response_code']],
+            'response_message': strings[row['message']],
+            'thread_name': strings[row['thread']],
+            'timestamp': datetime.datetime.fromtimestamp(int(row['timestamp']) / 1000).strftime('%Y-%m-%d %H:%M:%S'),
+        }
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ErrorDetailsView):
+            return _tables_equal(self._plan, other._plan, 'errors')
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+
+def _tables_equal(a: 'PlanResult', b: 'PlanResult', name: str) -> bool:
+    """比较两个计划的事务统计表或错误明细表（字符串列按字符串比较，可以使用不同的字符串表）"""
+    table_a, table_b = ((a.transaction_table, b.transaction_table) if name == 'transactions'
+                        else (a.error_table, b.error_table))
+    if len(table_a) != len(table_b):
+        return False
+    string_columns = _STRING_COLUMNS[name]
+    values_a = values_b = None
+    if a.strings is not b.strings:
+        values_a = np.array(a.strings.values, dtype=object)
+        values_b = np.array(b.strings.values, dtype=object)
+    for column in table_a.dtype.names:
+        column_a, column_b = table_a[column], table_b[column]
+        if column in string_columns and values_a is not None:
+            column_a, column_b = values_a[column_a], values_b[column_b]
+        if not np.array_equal(column_a, column_b, equal_nan=column_a.dtype.kind == 'f'):
+            return False
+    return True
+
+
+class PlanResult(MutableMapping):
+    """
+    单个测试计划的结果
+    汇总指标保存为属性，事务统计和错误明细保存为NumPy结构化数组，字符串通过StringTable共享；
+    同时实现字典接口（result['tps']、result.transactions.items()等），兼容原来的结果字典和报告模板。
+    其他字段（report_dir、generator、timeline等）保存在extra中。
+    加入RunResults后，修改汇总指标（result['tps'] = x 或 result.tps = x）会使其缓存的汇总数组失效
+    """
+
+    __slots__ = ('test_name',) + SUMMARY_FIELDS + ('transaction_table', 'error_table', 'strings', 'extra', '_owner')
+
+    def __init__(self, test_name: str, strings: Optional[StringTable] = None,
+                 transaction_table: Optional[np.ndarray] = None, error_table: Optional[np.ndarray] = None,
+                 extra: Optional[Dict[str, Any]] = None, **summary):
+        """
+        Args:
+            test_name: 测试名称
+            strings: 字符串表，为None时新建
+            transaction_table: TRANSACTION_DTYPE结构化数组
+            error_table: ERROR_DTYPE结构化数组
+            extra: 其他字段
+            **summary: SUMMARY_FIELDS中的汇总指标
+        """
+        self._owner: Optional['RunResults'] = None  # 所属的RunResults
+        self.test_name = test_name
+        self.strings = strings if strings is not None else StringTable()
+        self.transaction_table = (transaction_table if transaction_table is not None
+                                  else np.zeros(0, dtype=TRANSACTION_DTYPE))
+        self.error_table = error_table if error_table is not None else np.zeros(0, dtype=ERROR_DTYPE)
+        self.extra = dict(extra or {})
+        for name in SUMMARY_FIELDS:
+            setattr(self, name, summary.get(name, 0))
+
+    def __setattr__(self, name: str, value: Any):
+        object.__setattr__(self, name, value)
+        if name in SUMMARY_FIELDS and self._owner is not None:
+            self._owner._plan_table = None
+
+    # 字典接口
+
+    @property
+    def transactions(self) -> TransactionsView:
+        return TransactionsView(self)
+
+    @property
+    def error_details(self) -> ErrorDetailsView:
+        return ErrorDetailsView(self)
+
+    def _keys(self) -> List[str]:
+        return (['test_name'] + list(SUMMARY_FIELDS[:6]) + ['error_details', 'transactions']
+                + list(SUMMARY_FIELDS[6:]) + list(self.extra))
+
+    def __getitem__(self, key: str) -> Any:
+        if key == 'test_name' or key in SUMMARY_FIELDS or key in ('transactions', 'error_details'):
+            return getattr(self, key)
+        return self.extra[key]
+
+    def __setitem__(self, key: str, value: Any):
+        if key == 'test_name' or key in SUMMARY_FIELDS:
+            setattr(self, key, value)
+        elif key in ('transactions', 'error_details'):
+            raise KeyError(f"{key} 为只读视图")
+        else:
+            self.extra[key] = value
+
+    def __delitem__(self, key: str):
+        del self.extra[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys())
+
+    def __len__(self) -> int:
+        return len(self._keys())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, PlanResult):
+            return (self.test_name == other.test_name
+                    and all(getattr(self, name) == getattr(other, name) for name in SUMMARY_FIELDS)
+                    and self.extra == other.extra
+                    and _tables_equal(self, other, 'transactions') and _tables_equal(self, other, 'errors'))
+        if isinstance(other, Mapping):  # 与原来的结果字典比较
+            return self.as_dict() == dict(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return (f"PlanResult({self.test_name!r}, requests={self.total_requests}, "
+                f"transactions={len(self.transaction_table)}, errors={len(self.error_table)})")
+
+    def as_dict(self) -> Dict[str, Any]:
+        """转换为原来的结果字典（用于JSON输出）"""
+        data = {key: self[key] for key in self._keys()}
+        data['transactions'] = dict(data['transactions'].items())
+        data['error_details'] = list(data['error_details'])
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Mapping, strings: Optional[StringTable] = None) -> 'PlanResult':
+        """
+        从原来的结果字典（如旧版summary.json）构建
+        Args:
+            data: 结果字典
+            strings: 字符串表，为None时新建
+        Returns:
+            PlanResult: 计划结果
+        """
+        strings = strings if strings is not None else StringTable()
+        transactions = data.get('transactions', {})
+        table = np.zeros(len(transactions), dtype=TRANSACTION_DTYPE)
+        for i, (label, stats) in enumerate(transactions.items()):
+            table[i] = (strings.intern(_to_str(label)), stats['count'], stats['success'], stats['fail'],
+                        stats['avg_response_time'] * stats['count'], stats['min_response_time'],
+                        stats['max_response_time'])
+
+        errors = data.get('error_details', [])
+        error_table = np.zeros(len(errors), dtype=ERROR_DTYPE)
+        for i, error in enumerate(errors):
+            timestamp = datetime.datetime.strptime(error['timestamp'], '%Y-%m-%d %H:%M:%S').timestamp() * 1000
+            error_table[i] = (strings.intern(_to_str(error['label'])), strings.intern(_to_str(error['response_code'])),
+                              strings.intern(_to_str(error['response_message'])),
+                              strings.intern(_to_str(error['thread_name'])), int(timestamp))
+
+        reserved = {'test_name', 'transactions', 'error_details'} | set(SUMMARY_FIELDS)
+        return cls(data['test_name'], strings, table, error_table,
+                   extra={k: v for k, v in data.items() if k not in reserved},
+                   **{name: data.get(name, 0) for name in SUMMARY_FIELDS})
+
+    def copy(self, **changes) -> 'PlanResult':
+        """复制结果（数组共享，extra浅复制），changes中的字段覆盖原值"""
+        result = PlanResult(self.test_name, self.strings, self.transaction_table, self.error_table, self.extra,
+                            **{name: getattr(self, name) for name in SUMMARY_FIELDS})
+        for key, value in changes.items():
+            result[key] = value
+        return result
+
+    def rebind(self, strings: StringTable) -> 'PlanResult':
+        """
+        将字符串编号映射到另一个字符串表（合并到运行结果时使用）
+        Args:
+            strings: 目标字符串表
+        Returns:
+            PlanResult: 使用目标字符串表的新结果
+        """
+        if strings is self.strings:
+            return self
+        mapping = strings.intern_many(self.strings.values)
+        tables = {'transactions': self.transaction_table.copy(), 'errors': self.error_table.copy()}
+        for name, columns in _STRING_COLUMNS.items():
+            for column in columns:
+                tables[name][column] = mapping[tables[name][column]]
+        return PlanResult(self.test_name, strings, tables['transactions'], tables['errors'], self.extra,
+                          **{name: getattr(self, name) for name in SUMMARY_FIELDS})
+
+    # 二进制序列化
+
+    def save(self, output_file):
+        """
+        保存为压缩的npz（只包含本计划用到的字符串，以UTF-8字节块加偏移数组保存；其余字段以JSON保存在meta中）
+        Args:
+            output_file: 输出文件路径或以二进制模式打开的文件对象
+        """
+        tables = {'transactions': self.transaction_table.copy(), 'errors': self.error_table.copy()}
+        used = np.unique(np.concatenate([tables[name][column] for name, columns in _STRING_COLUMNS.items()
+                                         for column in columns]))
+        for name, columns in _STRING_COLUMNS.items():
+            for column in columns:
+                tables[name][column] = np.searchsorted(used, tables[name][column])
+        meta = dict({name: getattr(self, name) for name in SUMMARY_FIELDS}, test_name=self.test_name,
+                    extra=self.extra)
+        string_blob, string_offsets = _pack_strings([self.strings[i] for i in used.tolist()])
+        meta_blob, _ = _pack_strings([json.dumps(meta, ensure_ascii=False, default=_json_default)])
+        np.savez_compressed(output_file, string_blob=string_blob, string_offsets=string_offsets,
+                            meta=meta_blob, **tables)
+
+    @classmethod
+    def load(cls, summary_file: Path, strings: Optional[StringTable] = None) -> 'PlanResult':
+        """
+        读取npz格式的结果
+        Args:
+            summary_file: 文件路径
+            strings: 字符串表，为None时新建
+        Returns:
+            PlanResult: 计划结果
+        """
+        with np.load(summary_file, allow_pickle=False) as data:
+            strings = strings if strings is not None else StringTable()
+            if 'string_blob' in data.files:
+                values = _unpack_strings(data['string_blob'], data['string_offsets'])
+            else:  # 早期版本以定长Unicode数组保存
+                values = data['strings'].tolist()
+            mapping = strings.intern_many(values)
+            tables = {'transactions': data['transactions'], 'errors': data['errors']}
+            for name, columns in _STRING_COLUMNS.items():
+                for column in columns:
+                    tables[name][column] = mapping[tables[name][column]]
+            meta = data['meta']
+            meta = json.loads(meta.item() if meta.dtype.kind == 'U' else meta.tobytes().decode('utf-8'))
+        return cls(meta['test_name'], strings, tables['transactions'], tables['errors'], meta['extra'],
+                   **{name: meta[name] for name in SUMMARY_FIELDS})
+
+
+class RunResults(MutableMapping):
+    """
+    一次运行的全部计划结果：计划名称 -> PlanResult
+    所有计划共享一个字符串表，汇总指标按计划组成结构化数组，跨计划的合计以向量化方式计算
+    """
+
+    __slots__ = ('strings', '_plans', '_plan_table')
+
+    def __init__(self, results: Optional[Mapping] = None):
+        """
+        Args:
+            results: 计划名称 -> PlanResult或原来的结果字典
+        """
+        self.strings = StringTable()
+        self._plans: Dict[str, PlanResult] = {}
+        self._plan_table: Optional[np.ndarray] = None
+        for name, result in (results or {}).items():
+            self[name] = result
+
+    def __getitem__(self, name: str) -> PlanResult:
+        return self._plans[name]
+
+    def __setitem__(self, name: str, result: Any):
+        if isinstance(result, PlanResult):
+            result = result.rebind(self.strings)
+        else:
+            result = PlanResult.from_dict(result, self.strings)
+        if name in self._plans and self._plans[name] is not result:
+            self._plans[name]._owner = None
+        result._owner = self
+        self._plans[name] = result
+        self._plan_table = None
+
+    def __delitem__(self, name: str):
+        self._plans.pop(name)._owner = None
+        self._plan_table = None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._plans)
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    def plan_table(self) -> np.ndarray:
+        """各计划的汇总指标（PLAN_DTYPE结构化数组，顺序与计划名称一致，计划的汇总指标修改后重新生成）"""
+        if self._plan_table is None:
+            self._plan_table = np.array(
+                [tuple(getattr(plan, name) for name in SUMMARY_FIELDS) for plan in self._plans.values()],
+                dtype=PLAN_DTYPE)
+        return self._plan_table
+
+    def totals(self) -> Dict[str, Any]:
+        """
+        跨计划合计
+        Returns:
+            Dict: total_systems、total_requests、total_success、total_failed、
+                overall_avg_response_time（各计划平均响应时间的平均值）
+        """
+        table = self.plan_table()
+        return {
+            'total_systems': len(table),
+            'total_requests': int(table['total_requests'].sum()),
+            'total_success': int(table['successful_requests'].sum()),
+            'total_failed': int(table['failed_requests'].sum()),
+            'overall_avg_response_time': float(table['average_response_time'].mean()) if len(table) else 0,
+        }
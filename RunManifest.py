@@ -0,0 +1,141 @@
+import datetime
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# 计划状态
+STATE_QUEUED = 'queued'
+STATE_RUNNING = 'running'
+STATE_DONE = 'done'
+STATE_FAILED = 'failed'
+
+
+class ManifestNotFoundException(Exception): pass
+
+
+class RunManifest:
+    """
+    运行清单（只追加的JSON Lines文件）
+    第一行记录运行信息（时间戳、结果目录），之后每行记录一次计划状态变化，
+    每行写入后立即fsync，进程崩溃或主机重启后可据此恢复未完成的测试套件
+    """
+
+    FILE_PATTERN = 'run_manifest_*.jsonl'
+
+    def __init__(self, manifest_file: Path):
+        """
+        打开运行清单
+        Args:
+            manifest_file: 清单文件路径
+        """
+        self.manifest_file = Path(manifest_file)
+        self.run_info: Dict[str, Any] = {}  # 运行信息
+        self.plans: Dict[str, Dict[str, Any]] = {}  # 计划名称 -> 最新状态记录
+        self._lock = threading.Lock()
+        if self.manifest_file.exists():
+            self._load()
+
+    @classmethod
+    def create(cls, result_dir: Path, timestamp: str, **run_info) -> 'RunManifest':
+        """
+        创建新的运行清单
+        Args:
+            result_dir: 本次运行的结果目录
+            timestamp: 本次运行的时间戳
+            **run_info: 附加的运行信息
+        Returns:
+            RunManifest: 运行清单
+        """
+        manifest = cls(result_dir / f'run_manifest_{timestamp}.jsonl')
+        manifest.run_info = dict(run_info, event='run', timestamp=timestamp, result_dir=str(result_dir))
+        manifest._append(manifest.run_info)
+        return manifest
+
+    @classmethod
+    def load(cls, manifest_file: Path) -> 'RunManifest':
+        """
+        打开已有的运行清单（用于恢复运行）
+        Args:
+            manifest_file: 清单文件路径
+        Returns:
+            RunManifest: 运行清单
+        Raises:
+            ManifestNotFoundException: 文件不存在或没有运行信息记录时抛出
+        """
+        manifest_file = Path(manifest_file)
+        if not manifest_file.is_file():
+            raise ManifestNotFoundException(f"运行清单不存在: {manifest_file}")
+        manifest = cls(manifest_file)
+        if 'timestamp' not in manifest.run_info:
+            raise ManifestNotFoundException(f"不是有效的运行清单（缺少运行信息记录）: {manifest_file}")
+        return manifest
+
+    @classmethod
+    def find_latest(cls, result_base_dir: Path) -> Path:
+        """
+        查找结果基础目录下最近一次运行的清单
+        Args:
+            result_base_dir: 结果基础目录
+        Returns:
+            Path: 清单文件路径
+        Raises:
+            ManifestNotFoundException: 没有找到清单时抛出
+        """
+        # 文件名中的时间戳为 YYYYMMDD_HHMMSS，按文件名排序即按时间排序
+        manifests = sorted(result_base_dir.glob(f'*/{cls.FILE_PATTERN}'), key=lambda p: p.name)
+        if not manifests:
+            raise ManifestNotFoundException(f"在目录 {result_base_dir} 中没有找到可恢复的运行清单")
+        return manifests[-1]
+
+    def _load(self):
+        """重放清单中的记录，得到各计划的最新状态"""
+        with open(self.manifest_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:  # 崩溃时可能留下不完整的最后一行
+                    continue
+                if record.get('event') == 'run':
+                    self.run_info = record
+                elif 'plan' in record:
+                    self.plans[record['plan']] = record
+
+    def _append(self, record: Dict[str, Any]):
+        """追加一条记录并落盘"""
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.manifest_file, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def record(self, plan: str, state: str, **details):
+        """
+        记录计划状态
+        Args:
+            plan: 计划名称
+            state: 状态（queued/running/done/failed）
+            **details: 附加信息，如summary（摘要文件相对结果目录的路径）、error
+        """
+        entry = dict(details, plan=plan, state=state,
+                     time=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        self._append(entry)
+        with self._lock:
+            self.plans[plan] = entry
+
+    def completed_summary(self, plan: str) -> Optional[Path]:
+        """
+        获取已完成计划的摘要文件
+        Args:
+            plan: 计划名称
+        Returns:
+            Optional[Path]: 计划已完成且摘要文件存在时返回其路径，否则返回None
+        """
+        entry = self.plans.get(plan)
+        if not entry or entry['state'] != STATE_DONE or not entry.get('summary'):
+            return None
+        summary_file = self.manifest_file.parent / entry['summary']
+        return summary_file if summary_file.exists() else None
@@ -0,0 +1,266 @@
+import fnmatch
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import TestUtils
+
+# 未记录过耗时的计划在没有任何历史数据时的估计耗时（秒）
+DEFAULT_PLAN_DURATION = 600.0
+
+# TestPlan注释中的标签，例如 "tags: nightly, smoke"
+_COMMENTS_PATTERN = re.compile(r'<stringProp name="TestPlan\.comments">(.*?)</stringProp>', re.S)
+_TAGS_PATTERN = re.compile(r'tags\s*[:：]\s*([^\n<]*)', re.I)
+
+
+class ShardException(Exception): pass
+
+
+def parse_shard(spec: Optional[str]) -> Optional[Tuple[int, int]]:
+    """
+    解析分片参数
+    Args:
+        spec: 形如 "2/4" 的分片描述（从1开始），为空时不分片
+    Returns:
+        Optional[Tuple[int, int]]: (分片序号, 分片总数)
+    Raises:
+        ShardException: 格式无效时抛出
+    """
+    if not spec:
+        return None
+    match = re.fullmatch(r'\s*(\d+)\s*/\s*(\d+)\s*', str(spec))
+    if not match:
+        raise ShardException(f"分片格式无效（应为 i/n）: {spec}")
+    index, total = int(match.group(1)), int(match.group(2))
+    if total < 1 or not 1 <= index <= total:
+        raise ShardException(f"分片序号超出范围: {spec}")
+    return index, total
+
+
+def plan_tags(jmx_file: Path, test_dir: Path) -> List[str]:
+    """
+    获取测试计划的标签
+    标签来源：相对测试目录的各级子目录名，以及TestPlan注释中的 "tags: a, b"
+    Args:
+        jmx_file: JMX文件路径
+        test_dir: 测试目录
+    Returns:
+        List[str]: 标签列表
+    """
+    try:
+        tags = list(jmx_file.relative_to(test_dir).parent.parts)
+    except ValueError:
+        tags = []
+    with open(jmx_file, 'r', encoding='utf-8', errors='ignore') as f:
+        head = f.read(64 * 1024)  # TestPlan元素位于文件开头
+    comments = _COMMENTS_PATTERN.search(head)
+    if comments:
+        for line in _TAGS_PATTERN.findall(comments.group(1)):
+            tags.extend(tag.strip() for tag in line.split(',') if tag.strip())
+    return tags
+
+
+def filter_plans(jmx_files: Iterable[Path], test_dir: Path, include: Sequence[str] = (),
+                 exclude: Sequence[str] = (), tags: Sequence[str] = ()) -> List[Path]:
+    """
+    按glob和标签筛选测试计划
+    Args:
+        jmx_files: JMX文件列表
+        test_dir: 测试目录，glob匹配相对该目录的路径（同时也匹配文件名）
+        include: 包含的glob，为空时包含全部
+        exclude: 排除的glob
+        tags: 需要具有的标签（任意一个即可），为空时不按标签筛选
+    Returns:
+        List[Path]: 筛选后的JMX文件列表
+    """
+    def matches(path: Path, patterns: Sequence[str]) -> bool:
+        try:
+            relative = path.relative_to(test_dir).as_posix()
+        except ValueError:
+            relative = path.as_posix()
+        return any(fnmatch.fnmatch(relative, p) or fnmatch.fnmatch(path.name, p) for p in patterns)
+
+    selected = []
+    for jmx_file in jmx_files:
+        if include and not matches(jmx_file, include):
+            continue
+        if exclude and matches(jmx_file, exclude):
+            continue
+        if tags and not set(tags) & set(plan_tags(jmx_file, test_dir)):
+            continue
+        selected.append(jmx_file)
+    return selected
+
+
+def balance_shards(jmx_files: Iterable[Path], durations: Dict[str, float], total: int) -> List[List[Path]]:
+    """
+    按历史耗时将测试计划分配到各分片（最长处理时间优先的贪心算法）
+    结果只取决于文件列表和历史耗时，各CI节点独立计算得到相同的分配
+    Args:
+        jmx_files: JMX文件列表
+        durations: 计划名称 -> 历史耗时（秒）
+        total: 分片总数
+    Returns:
+        List[List[Path]]: 每个分片的JMX文件列表
+    """
+    jmx_files = sorted(jmx_files, key=lambda p: p.as_posix())
+    known = sorted(durations[p.stem] for p in jmx_files if p.stem in durations)
+    # 没有历史数据的计划按已知耗时的中位数估计
+    default = known[len(known) // 2] if known else DEFAULT_PLAN_DURATION
+
+    ordered = sorted(jmx_files, key=lambda p: (-durations.get(p.stem, default), p.as_posix()))
+    shards: List[List[Path]] = [[] for _ in range(total)]
+    loads = [0.0] * total
+    for jmx_file in ordered:
+        target = min(range(total), key=lambda i: (loads[i], i))
+        shards[target].append(jmx_file)
+        loads[target] += durations.get(jmx_file.stem, default)
+    return shards
+
+
+class PlanHistory:
+    """
+    测试计划历史耗时记录
+    JSON文件包含durations（计划名称 -> 平滑后的耗时秒数）和applied（已合并的运行标识，避免重复合并），
+    兼容只有 计划名称 -> 耗时 的旧格式
+    """
+
+    MAX_APPLIED = 1000  # 保留的已合并运行标识数量
+
+    def __init__(self, history_file: Path, smoothing: float = 0.5):
+        """
+        初始化历史记录
+        Args:
+            history_file: 历史记录文件
+            smoothing: 新耗时的权重（指数移动平均）
+        """
+        self.history_file = Path(history_file)
+        self.smoothing = smoothing
+        self.durations: Dict[str, float] = {}
+        self.applied: List[str] = []
+        if self.history_file.exists():
+            with open(self.history_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data.get('durations'), dict):
+                self.durations = data['durations']
+                self.applied = list(data.get('applied', []))
+            else:  # 旧格式
+                self.durations = data
+
+    def update(self, durations: Dict[str, float], run_id: Optional[str] = None) -> bool:
+        """
+        合并新的耗时数据
+        Args:
+            durations: 计划名称 -> 本次耗时（秒）
+            run_id: 运行标识，已合并过的运行不再重复合并，为None时总是合并
+        Returns:
+            bool: 是否合并
+        """
+        if run_id is not None:
+            if run_id in self.applied:
+                return False
+            self.applied = (self.applied + [run_id])[-self.MAX_APPLIED:]
+        for name, seconds in durations.items():
+            previous = self.durations.get(name)
+            self.durations[name] = seconds if previous is None else (
+                self.smoothing * seconds + (1 - self.smoothing) * previous)
+        return True
+
+    def save(self):
+        """保存历史记录"""
+        self.history_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.history_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'durations': self.durations, 'applied': self.applied}, f,
+                      ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_file, self.history_file)
+
+
+def collect_shard_manifests(paths: Iterable[Path]) -> List[Path]:
+    """
+    展开分片清单路径（目录下递归查找 shard_*_of_*.json）
+    Args:
+        paths: 清单文件或目录
+    Returns:
+        List[Path]: 清单文件列表
+    """
+    manifests = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            manifests.extend(sorted(path.glob('**/shard_*_of_*.json')))
+        else:
+            manifests.append(path)
+    return manifests
+
+
+def shard_run_id(manifest: Dict) -> str:
+    """分片清单对应的运行标识（分片序号/总数及该分片的运行时间戳），用于避免重复合并耗时"""
+    index, total = manifest['shard']
+    return f"shard_{index}_of_{total}_{manifest['timestamp']}"
+
+
+def merge_shard_manifests(manifest_files: Sequence[Path]) -> Tuple[Dict[str, dict], Dict[str, Dict[str, float]],
+                                                                   List[str]]:
+    """
+    合并各分片的结果摘要
+    并根据清单中记录的分配结果检查各分片是否按同一份计划列表和历史耗时分配：
+    分配不一致、计划未被任何分片执行或被多个分片执行时给出警告
+    Args:
+        manifest_files: 分片清单文件列表
+    Returns:
+        Tuple: (计划名称 -> 结果摘要, 分片运行标识 -> (计划名称 -> 耗时), 警告信息列表)
+    Raises:
+        ShardException: 没有清单或分片总数不一致时抛出
+    """
+    if not manifest_files:
+        raise ShardException("没有找到分片清单（shard_*_of_*.json）")
+
+    results: Dict[str, dict] = {}
+    owners: Dict[str, int] = {}  # 计划名称 -> 所在分片
+    durations: Dict[str, Dict[str, float]] = {}
+    warnings: List[str] = []
+    seen_shards = set()
+    totals = set()
+    executed: Dict[str, List[int]] = {}  # 计划名称 -> 执行该计划的分片
+    expected_plans = set()
+    splits = set()
+    for manifest_file in manifest_files:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        index, total = manifest['shard']
+        totals.add(total)
+        if index in seen_shards:
+            warnings.append(f"分片 {index}/{total} 存在多个清单，后出现的覆盖之前的结果: {manifest_file}")
+        seen_shards.add(index)
+        for name in manifest['plans']:
+            executed.setdefault(name, []).append(index)
+        split = manifest.get('split')
+        if split:  # 旧版清单没有记录分配结果
+            expected_plans.update(split['plans'])
+            splits.add(json.dumps(split['shards']))
+
+        for name, relative in manifest['summaries'].items():
+            if owners.get(name, index) != index:
+                warnings.append(f"计划 {name} 出现在多个分片中，使用 {manifest_file} 中的结果")
+            owners[name] = index
+            # 摘要路径相对清单所在目录，CI产物下载到任意位置均可读取
+            results[name] = TestUtils.TestUtils.load_summary(Path(manifest_file).parent / relative)
+        durations[shard_run_id(manifest)] = manifest['durations']
+        if manifest['failed']:
+            warnings.append(f"分片 {index}/{total} 中失败的计划: {', '.join(manifest['failed'])}")
+
+    if len(totals) > 1:
+        raise ShardException(f"分片清单的分片总数不一致: {sorted(totals)}")
+    missing = sorted(set(range(1, totals.pop() + 1)) - seen_shards)
+    if missing:
+        warnings.append(f"缺少分片: {', '.join(map(str, missing))}，合并报告不完整")
+    if len(splits) > 1:
+        warnings.append("各分片计算的分配结果不一致（计划列表或历史耗时不同），部分计划可能重复执行或被遗漏")
+    duplicated = sorted(name for name, indexes in executed.items() if len(set(indexes)) > 1)
+    if duplicated:
+        warnings.append(f"以下计划被多个分片执行: {', '.join(duplicated)}")
+    unassigned = sorted(expected_plans - set(executed))
+    if unassigned and not missing:
+        warnings.append(f"以下计划没有被任何分片执行: {', '.join(unassigned)}")
+    return results, durations, warnings
@@ -1,49 +1,224 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import re
+import threading
 import  datetime
 from pathlib import Path
+from typing import Any, Dict, Mapping, MutableMapping, Optional
+
+# 日志队列监听器（进程内唯一），所有磁盘/控制台写入都在监听线程中完成
+_log_listener: Optional[logging.handlers.QueueListener] = None
+_plan_router: Optional['PlanLogRouter'] = None
+_log_lock = threading.Lock()
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class JsonFormatter(logging.Formatter):
+    """JSON结构化日志格式器，每条记录输出一行JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'time': self.formatTime(record, LOG_DATE_FORMAT),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        plan = getattr(record, 'plan', None)  # 测试计划名称（通过LoggerAdapter注入）
+        if plan:
+            payload['plan'] = plan
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False)
+
+
+class PlanLogRouter(logging.Handler):
+    """
+    按测试计划分发日志的处理器
+    带有plan属性的日志记录会额外写入该计划结果目录下的独立日志文件
+    """
+
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self._handlers: Dict[str, logging.Handler] = {}  # 计划名称 -> 文件处理器
+        self._handlers_lock = threading.Lock()
+
+    def open(self, plan: str, log_file: Path, formatter: logging.Formatter):
+        """为测试计划打开独立日志文件"""
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        handler = logging.FileHandler(log_file, encoding='utf-8')
+        handler.setLevel(logging.DEBUG)  # 计划日志保留JMeter完整输出
+        handler.setFormatter(formatter)
+        with self._handlers_lock:
+            old = self._handlers.pop(plan, None)
+            self._handlers[plan] = handler
+        if old:
+            old.close()
+
+    def close_plan(self, plan: str):
+        """关闭测试计划的独立日志文件"""
+        with self._handlers_lock:
+            handler = self._handlers.pop(plan, None)
+        if handler:
+            handler.close()
+
+    def emit(self, record: logging.LogRecord):
+        plan = getattr(record, 'plan', None)
+        if not plan:
+            return
+        if getattr(record, 'plan_log_close', False):  # 关闭指令与日志同走队列，保证先写完再关闭
+            self.close_plan(plan)
+            return
+        with self._handlers_lock:
+            handler = self._handlers.get(plan)
+        if handler:
+            handler.handle(record)
+
+    def close(self):
+        with self._handlers_lock:
+            handlers = list(self._handlers.values())
+            self._handlers.clear()
+        for handler in handlers:
+            handler.close()
+        super().close()
+
 
 class TestUtils:
     """测试工具类，处理目录创建和日志配置"""
 
     @staticmethod
-    def setup_logging(log_dir: Path) -> logging.Logger:
+    def setup_logging(log_dir: Path, json_format: bool = False, max_bytes: int = 0,
+                      backup_count: int = 7) -> logging.Logger:
         """
-        配置日志
+        配置日志（幂等，重复调用不会重复添加处理器）
+        日志记录通过QueueHandler进入队列，由后台QueueListener线程统一写入文件和控制台，
+        测试线程不会因磁盘写入而阻塞
         Args:
             log_dir: 日志目录
+            json_format: 是否输出JSON结构化日志
+            max_bytes: 主日志按大小滚动的阈值（字节），为0时按天滚动
+            backup_count: 保留的历史日志文件数
         Returns:
             logging.Logger: 日志记录器
         """
-        # 确保日志目录存在
-        log_dir.mkdir(parents=True, exist_ok=True)  # 创建日志目录，包括所有必要的父目录
+        global _log_listener, _plan_router
 
         # 创建日志记录器
         logger = logging.getLogger('JMeterTest')  # 创建名为'JMeterTest'的日志记录器
-        logger.setLevel(logging.INFO)  # 设置日志级别为INFO
 
-        # 创建按天滚动的文件处理器
-        log_file = log_dir / f'test_{datetime.datetime.now().strftime("%Y%m%d")}.log'  # 生成按日期命名的日志文件
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')  # 创建文件处理器，使用UTF-8编码
-        file_handler.setLevel(logging.INFO)  # 设置文件处理器日志级别为INFO
+        with _log_lock:
+            if _log_listener is not None:  # 已配置过，直接复用
+                return logger
+
+            # 确保日志目录存在
+            log_dir.mkdir(parents=True, exist_ok=True)  # 创建日志目录，包括所有必要的父目录
+
+            logger.setLevel(logging.DEBUG)  # 记录器放行DEBUG，由各处理器自行过滤
+            logger.propagate = False  # 避免根记录器重复输出
 
-        # 创建控制台处理器
-        console_handler = logging.StreamHandler()  # 创建控制台处理器
-        console_handler.setLevel(logging.INFO)  # 设置控制台处理器日志级别为INFO
+            # 设置日志格式
+            if json_format:
+                formatter = JsonFormatter()
+            else:
+                formatter = logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT)  # 日志格式：时间-级别-消息
 
-        # 设置日志格式
-        formatter = logging.Formatter(  # 创建日志格式器
-            '%(asctime)s - %(levelname)s - %(message)s',  # 日志格式：时间-级别-消息
-            datefmt='%Y-%m-%d %H:%M:%S'  # 日期格式
-        )
-        file_handler.setFormatter(formatter)  # 设置文件处理器格式
-        console_handler.setFormatter(formatter)  # 设置控制台处理器格式
+            # 创建滚动的主日志文件处理器
+            log_file = log_dir / 'test.log'
+            if max_bytes > 0:
+                file_handler = logging.handlers.RotatingFileHandler(  # 按大小滚动
+                    log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+            else:
+                file_handler = logging.handlers.TimedRotatingFileHandler(  # 按天滚动
+                    log_file, when='midnight', backupCount=backup_count, encoding='utf-8')
+                file_handler.suffix = '%Y%m%d'
+                # 清理历史文件时按extMatch识别后缀，需与suffix一致，否则backup_count不生效
+                file_handler.extMatch = re.compile(r'^\d{8}(\.\w+)?$', re.ASCII)
+            file_handler.setLevel(logging.INFO)  # 设置文件处理器日志级别为INFO
+            file_handler.setFormatter(formatter)  # 设置文件处理器格式
 
-        # 添加处理器
-        logger.addHandler(file_handler)  # 添加文件处理器到日志记录器
-        logger.addHandler(console_handler)  # 添加控制台处理器到日志记录器
+            # 创建控制台处理器
+            console_handler = logging.StreamHandler()  # 创建控制台处理器
+            console_handler.setLevel(logging.INFO)  # 设置控制台处理器日志级别为INFO
+            console_handler.setFormatter(formatter)  # 设置控制台处理器格式
+
+            # 计划日志的关闭指令不输出到主日志和控制台
+            for handler in (file_handler, console_handler):
+                handler.addFilter(lambda record: not getattr(record, 'plan_log_close', False))
+
+            # 按计划分发的处理器
+            _plan_router = PlanLogRouter()
+            _plan_router.setFormatter(formatter)
+
+            # 记录器只挂载队列处理器，实际写入由监听线程完成
+            log_queue = queue.SimpleQueue()
+            queue_handler = logging.handlers.QueueHandler(log_queue)
+            logger.handlers.clear()
+            logger.addHandler(queue_handler)
+
+            _log_listener = logging.handlers.QueueListener(
+                log_queue, file_handler, console_handler, _plan_router,
+                respect_handler_level=True
+            )
+            _log_listener.start()
+            atexit.register(TestUtils.shutdown_logging)
 
         return logger  # 返回配置好的日志记录器
 
+    @staticmethod
+    def shutdown_logging():
+        """停止日志监听线程并刷新、关闭所有处理器"""
+        global _log_listener, _plan_router
+        with _log_lock:
+            if _log_listener is None:
+                return
+            _log_listener.stop()  # 处理完队列中剩余的记录后停止
+            for handler in _log_listener.handlers:
+                handler.close()
+            _log_listener = None
+            _plan_router = None
+            logging.getLogger('JMeterTest').handlers.clear()
+
+    @staticmethod
+    def open_plan_log(plan: str, log_file: Path):
+        """
+        为测试计划开启独立日志文件
+        只有携带plan属性（通过plan_logger获得的适配器）的记录会写入该文件
+        Args:
+            plan: 测试计划名称
+            log_file: 日志文件路径
+        """
+        if _plan_router is not None:
+            _plan_router.open(plan, log_file, _plan_router.formatter)
+
+    @staticmethod
+    def close_plan_log(plan: str):
+        """
+        关闭测试计划的独立日志文件
+        Args:
+            plan: 测试计划名称
+        """
+        if _plan_router is not None:
+            logging.getLogger('JMeterTest').debug(
+                'close plan log', extra={'plan': plan, 'plan_log_close': True})
+
+    @staticmethod
+    def plan_logger(logger: logging.Logger, plan: str) -> logging.LoggerAdapter:
+        """
+        获取带测试计划上下文的日志适配器
+        Args:
+            logger: 基础日志记录器
+            plan: 测试计划名称
+        Returns:
+            logging.LoggerAdapter: 记录会附带plan属性
+        """
+        return logging.LoggerAdapter(logger, {'plan': plan})
+
     @staticmethod
     def create_daily_directory(base_dir: Path) -> Path:
         """
@@ -58,6 +233,61 @@ class TestUtils:
         daily_dir.mkdir(parents=True, exist_ok=True)  # 创建目录，包括所有必要的父目录
         return daily_dir  # 返回创建的目录路径
 
+    @staticmethod
+    def save_summary(summary: Mapping[str, Any], summary_file: Path):
+        """
+        保存测试结果摘要
+        扩展名为.npz时保存为二进制（结构化数组+字符串表，读写快、体积小），否则保存为JSON
+        Args:
+            summary: parse_results返回的PlanResult或结果字典
+            summary_file: 输出文件路径
+        """
+        from ResultModel import PlanResult  # 延迟导入，避免拖慢命令行启动
+
+        summary_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = summary_file.with_name(summary_file.name + '.tmp')
+        if summary_file.suffix == '.npz':
+            if not isinstance(summary, PlanResult):
+                summary = PlanResult.from_dict(summary)
+            with open(tmp_file, 'wb') as f:
+                summary.save(f)
+        else:
+            if isinstance(summary, PlanResult):
+                summary = summary.as_dict()
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                # numpy标量转换为Python内置类型
+                json.dump(summary, f, ensure_ascii=False,
+                          default=lambda o: o.item() if hasattr(o, 'item') else str(o))
+        os.replace(tmp_file, summary_file)  # 原子替换，避免中断时留下半个文件
+
+    @staticmethod
+    def load_summary(summary_file: Path) -> MutableMapping[str, Any]:
+        """
+        读取保存的测试结果摘要（.npz或JSON格式）
+        Args:
+            summary_file: 摘要文件路径
+        Returns:
+            PlanResult: 测试结果（兼容原结果字典的接口）
+        """
+        from ResultModel import PlanResult  # 延迟导入，避免拖慢命令行启动
+
+        summary_file = Path(summary_file)
+        if summary_file.suffix == '.npz':
+            return PlanResult.load(summary_file)
+        with open(summary_file, 'r', encoding='utf-8') as f:
+            return PlanResult.from_dict(json.load(f))
+
+    @staticmethod
+    def get_jmeter_bin(jmeter_home: Path) -> Path:
+        """
+        获取JMeter可执行文件路径（Windows为jmeter.bat，其他系统为jmeter）
+        Args:
+            jmeter_home: JMeter安装目录
+        Returns:
+            Path: JMeter可执行文件路径
+        """
+        return jmeter_home / 'bin' / ('jmeter.bat' if os.name == 'nt' else 'jmeter')
+
     @staticmethod
     def check_jmeter_installation(jmeter_home: Path) -> bool:
         """
@@ -67,5 +297,5 @@ class TestUtils:
         Returns:
             bool: 安装是否有效
         """
-        jmeter_bin = jmeter_home / 'bin' / 'jmeter.bat'  # 组合JMeter可执行文件路径
+        jmeter_bin = TestUtils.get_jmeter_bin(jmeter_home)  # 组合JMeter可执行文件路径
         return jmeter_bin.exists()  # 检查文件是否存在，返回布尔值
@@ -0,0 +1,75 @@
+"""
+模拟JMeter命令行的假可执行程序
+接受 run_single_test 使用的参数（-n -t -l -e -o -J...），休眠一段时间后写出合成JTL，
+使 run_all_tests 可以在没有JMeter的Linux机器上做端到端基准测试
+
+行为通过环境变量控制：
+    FAKE_JMETER_SLEEP   模拟的执行时长（秒），默认1
+    FAKE_JMETER_ROWS    生成的JTL行数，默认10000
+    FAKE_JMETER_LABELS  事务数量，默认20
+    FAKE_JMETER_ERROR_RATE  错误率，默认0.01
+"""
+import argparse
+import os
+import stat
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from generate_jtl import generate_jtl  # noqa: E402
+
+
+def install_fake_jmeter(jmeter_home: Path) -> Path:
+    """
+    在指定目录下安装假JMeter（bin/jmeter 与 bin/jmeter.bat）
+    Args:
+        jmeter_home: 假JMeter安装目录
+    Returns:
+        Path: 安装目录
+    """
+    jmeter_home = Path(jmeter_home)
+    bin_dir = jmeter_home / 'bin'
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    script = Path(__file__).resolve()
+
+    shell_launcher = bin_dir / 'jmeter'
+    shell_launcher.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{script}" "$@"\n', encoding='utf-8')
+    shell_launcher.chmod(shell_launcher.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+    bat_launcher = bin_dir / 'jmeter.bat'
+    bat_launcher.write_text(f'@"{sys.executable}" "{script}" %*\r\n', encoding='utf-8')
+    return jmeter_home
+
+
+def main():
+    parser = argparse.ArgumentParser(description='fake jmeter')
+    parser.add_argument('-n', action='store_true', help='非GUI模式（忽略）')
+    parser.add_argument('-t', dest='jmx_file', required=True, help='测试计划')
+    parser.add_argument('-l', dest='jtl_file', required=True, help='结果文件')
+    parser.add_argument('-e', action='store_true', help='生成HTML报告')
+    parser.add_argument('-o', dest='report_dir', help='报告目录')
+    args, _ = parser.parse_known_args()  # 忽略 -J 等属性参数
+
+    print(f"Creating summariser <summary>\nStarting standalone test @ {time.ctime()}")
+    time.sleep(float(os.environ.get('FAKE_JMETER_SLEEP', '1')))
+
+    seed = sum(Path(args.jmx_file).stem.encode('utf-8'))  # 同一计划每次生成相同数据
+    generate_jtl(
+        Path(args.jtl_file),
+        rows=int(os.environ.get('FAKE_JMETER_ROWS', '10000')),
+        labels=int(os.environ.get('FAKE_JMETER_LABELS', '20')),
+        error_rate=float(os.environ.get('FAKE_JMETER_ERROR_RATE', '0.01')),
+        seed=seed,
+    )
+
+    if args.e and args.report_dir:
+        report_dir = Path(args.report_dir)
+        report_dir.mkdir(parents=True, exist_ok=True)
+        (report_dir / 'index.html').write_text('<html><body>fake jmeter report</body></html>', encoding='utf-8')
+
+    print(f"Tidying up ...    @ {time.ctime()}\n... end of run")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+合成JTL结果文件生成器
+按JMeter默认CSV格式分块生成指定行数的结果，内存占用与总行数无关，
+可用于在没有JMeter和真实流量的情况下压测 parse_results 与报告生成
+
+示例用法：
+    python benchmarks/generate_jtl.py out.jtl --rows 1000000 --labels 50 --error-rate 0.01
+"""
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# JMeter默认CSV输出列
+JTL_COLUMNS = [
+    'timeStamp', 'elapsed', 'label', 'responseCode', 'responseMessage', 'threadName',
+    'dataType', 'success', 'failureMessage', 'bytes', 'sentBytes', 'grpThreads',
+    'allThreads', 'URL', 'Latency', 'IdleTime', 'Connect'
+]
+
+LATENCY_DISTRIBUTIONS = ('lognormal', 'exponential', 'normal', 'uniform')
+
+# 默认起始时间戳（2023-11-14 22:13:20 UTC），固定取值使相同参数生成的文件逐字节相同
+DEFAULT_START_MS = 1_700_000_000_000
+
+
+def _sample_latency(rng: np.random.Generator, distribution: str, mean_ms: float, n: int) -> np.ndarray:
+    """
+    按指定分布生成响应时间（毫秒，至少为1）
+    Args:
+        rng: 随机数生成器
+        distribution: 分布名称
+        mean_ms: 平均响应时间
+        n: 样本数
+    Returns:
+        np.ndarray: 响应时间数组
+    """
+    if distribution == 'lognormal':
+        sigma = 0.6
+        values = rng.lognormal(np.log(mean_ms) - sigma ** 2 / 2, sigma, n)
+    elif distribution == 'exponential':
+        values = rng.exponential(mean_ms, n)
+    elif distribution == 'normal':
+        values = rng.normal(mean_ms, mean_ms / 4, n)
+    elif distribution == 'uniform':
+        values = rng.uniform(0, mean_ms * 2, n)
+    else:
+        raise ValueError(f"不支持的响应时间分布: {distribution}")
+    return np.maximum(values, 1).astype(np.int64)
+
+
+def generate_jtl(jtl_file: Path, rows: int, labels: int = 20, error_rate: float = 0.01,
+                 latency: str = 'lognormal', mean_ms: float = 200, duration_s: float = 600,
+                 threads: int = 50, seed: int = 42, chunk_size: int = 1_000_000,
+                 start_ms: int = DEFAULT_START_MS) -> Path:
+    """
+    生成合成JTL文件
+    Args:
+        jtl_file: 输出文件路径
+        rows: 总行数
+        labels: 事务（label）数量
+        error_rate: 错误率（0~1）
+        latency: 响应时间分布（lognormal/exponential/normal/uniform）
+        mean_ms: 平均响应时间（毫秒）
+        duration_s: 测试时长（秒），时间戳在该区间内均匀递增
+        threads: 线程数
+        seed: 随机种子，相同参数生成相同文件
+        chunk_size: 每次写入的行数
+        start_ms: 起始时间戳（毫秒），默认为固定的DEFAULT_START_MS
+    Returns:
+        Path: 输出文件路径
+    """
+    jtl_file = Path(jtl_file)
+    jtl_file.parent.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    step_ms = duration_s * 1000 / max(rows, 1)  # 相邻样本的时间间隔
+
+    label_names = np.array([f'Transaction_{i:03d}' for i in range(labels)], dtype=object)
+    thread_names = np.array([f'Thread Group 1-{i}' for i in range(1, threads + 1)], dtype=object)
+    urls = np.array([f'http://sut.example.com/api/tx{i:03d}' for i in range(labels)], dtype=object)
+
+    with open(jtl_file, 'w', encoding='utf-8', newline='') as f:
+        written = 0
+        while written < rows:
+            n = min(chunk_size, rows - written)
+            index = np.arange(written, written + n)
+            label_idx = rng.integers(0, labels, n)
+            elapsed = _sample_latency(rng, latency, mean_ms, n)
+            success = rng.random(n) >= error_rate
+            connect = np.minimum(rng.integers(0, 20, n), elapsed)
+
+            chunk = pd.DataFrame({
+                'timeStamp': (start_ms + index * step_ms).astype(np.int64),
+                'elapsed': elapsed,
+                'label': label_names[label_idx],
+                'responseCode': np.where(success, '200', '500'),
+                'responseMessage': np.where(success, 'OK', 'Internal Server Error'),
+                'threadName': thread_names[rng.integers(0, threads, n)],
+                'dataType': 'text',
+                'success': np.where(success, 'true', 'false'),
+                'failureMessage': np.where(success, '', 'Response code was not 200'),
+                'bytes': rng.integers(200, 20000, n),
+                'sentBytes': rng.integers(100, 1000, n),
+                'grpThreads': threads,
+                'allThreads': threads,
+                'URL': urls[label_idx],
+                'Latency': (elapsed * 0.8).astype(np.int64),
+                'IdleTime': 0,
+                'Connect': connect,
+            }, columns=JTL_COLUMNS)
+            chunk.to_csv(f, header=(written == 0), index=False)
+            written += n
+
+    return jtl_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成合成JMeter JTL结果文件')
+    parser.add_argument('jtl_file', type=Path, help='输出文件路径')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='总行数')
+    parser.add_argument('--labels', type=int, default=20, help='事务数量')
+    parser.add_argument('--error-rate', type=float, default=0.01, help='错误率（0~1）')
+    parser.add_argument('--latency', choices=LATENCY_DISTRIBUTIONS, default='lognormal', help='响应时间分布')
+    parser.add_argument('--mean-ms', type=float, default=200, help='平均响应时间（毫秒）')
+    parser.add_argument('--duration', type=float, default=600, help='测试时长（秒）')
+    parser.add_argument('--threads', type=int, default=50, help='线程数')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    generate_jtl(args.jtl_file, args.rows, labels=args.labels, error_rate=args.error_rate,
+                 latency=args.latency, mean_ms=args.mean_ms, duration_s=args.duration,
+                 threads=args.threads, seed=args.seed)
+    print(f"已生成 {args.rows} 行: {args.jtl_file}（{time.perf_counter() - started:.1f}s）")
+
+
+if __name__ == '__main__':
+    main()
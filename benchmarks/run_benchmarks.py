@@ -0,0 +1,215 @@
+"""
+性能基准测试
+对命令行启动、parse_results、generate_charts、generate_html_report 以及基于假JMeter的 run_all_tests
+做可重复的耗时与内存测量，并与保存的基线对比以发现性能退化
+
+基线与机器相关，不随代码提交：在固定的CI基准机上用相同参数记录一次并作为CI缓存/产物保存，
+之后的CI运行下载该文件后对比。没有基线或基线中没有相同参数的结果时返回码为2，避免误以为已通过对比
+
+示例用法：
+    # 在基准机上记录基线
+    python benchmarks/run_benchmarks.py --update-baseline
+    # 之后每次改动后对比基线，退化超过容差时返回码为1
+    python benchmarks/run_benchmarks.py --baseline /path/to/baseline.json --tolerance 0.2
+    # 只测量、不对比
+    python benchmarks/run_benchmarks.py --no-compare
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+sys.path.insert(0, str(BENCH_DIR))
+
+import JMeterTestRunner  # noqa: E402
+import ReportGenerator  # noqa: E402
+from ResultModel import RunResults  # noqa: E402
+from fake_jmeter import install_fake_jmeter  # noqa: E402
+from generate_jtl import generate_jtl  # noqa: E402
+
+DEFAULT_BASELINE = BENCH_DIR / 'baseline.json'
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """
+    测量函数耗时与内存峰值
+    先执行repeat次计时（不开启tracemalloc以免干扰计时），再单独执行一次测量内存峰值
+    Args:
+        func: 被测函数
+        repeat: 计时次数
+    Returns:
+        Dict: median_s、min_s、peak_mb
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'median_s': statistics.median(timings),
+        'min_s': min(timings),
+        'peak_mb': peak / 1024 / 1024,
+    }
+
+
+def build_benchmarks(workdir: Path, rows: int, plans: int, labels: int, sleep: float,
+                     plan_rows: int) -> Dict[str, Callable[[], Any]]:
+    """
+    准备基准测试数据并返回各基准函数
+    Args:
+        workdir: 工作目录
+        rows: parse_results使用的JTL行数
+        plans: 报告与端到端测试的测试计划数
+        labels: 事务数量
+        sleep: 假JMeter每个计划的执行时长（秒）
+        plan_rows: 端到端测试中每个计划的JTL行数
+    Returns:
+        Dict: 基准名称 -> 无参函数
+    """
+    jmeter_home = install_fake_jmeter(workdir / 'jmeter')
+    test_dir = workdir / 'plans'
+    test_dir.mkdir(parents=True, exist_ok=True)
+    for i in range(plans):
+        (test_dir / f'plan_{i:03d}.jmx').write_text('<jmeterTestPlan/>', encoding='utf-8')
+
+    # 合成JTL按参数缓存，重复运行时不必重新生成
+    jtl_file = workdir / 'data' / f'synthetic_{rows}_{labels}.jtl'
+    if not jtl_file.exists():
+        print(f"生成合成JTL（{rows} 行）: {jtl_file}")
+        generate_jtl(jtl_file, rows, labels=labels)
+
+    runner = JMeterTestRunner.JMeterTestRunner(str(jmeter_home), str(test_dir), str(workdir / 'results'))
+    summary = runner.parse_results(jtl_file, 'synthetic')
+    results = RunResults({f'plan_{i:03d}': summary.copy(test_name=f'plan_{i:03d}') for i in range(plans)})
+    report_dir = workdir / 'reports'
+    report_dir.mkdir(parents=True, exist_ok=True)
+
+    def run_all_tests():
+        os.environ['FAKE_JMETER_SLEEP'] = str(sleep)
+        os.environ['FAKE_JMETER_ROWS'] = str(plan_rows)
+        os.environ['FAKE_JMETER_LABELS'] = str(labels)
+        e2e_runner = JMeterTestRunner.JMeterTestRunner(
+            str(jmeter_home), str(test_dir), str(workdir / 'results'))
+        e2e_runner.run_all_tests()
+        return e2e_runner.all_results
+
+    def cli_startup():
+        # 命令行启动耗时（含解释器启动和模块导入），check子命令不应导入pandas/plotly/jinja2
+        env = dict(os.environ, JMETER_HOME=str(jmeter_home), TEST_DIR=str(test_dir))
+        subprocess.run([sys.executable, str(BENCH_DIR.parent / 'mainrun.py'), 'check'],
+                       env=env, check=True, capture_output=True)
+
+    return {
+        'cli_startup': cli_startup,
+        'parse_results': lambda: runner.parse_results(jtl_file, 'synthetic'),
+        'generate_charts': lambda: ReportGenerator.ReportGenerator(results, report_dir).generate_charts(),
+        'generate_html_report': lambda: ReportGenerator.ReportGenerator(results, report_dir).generate_html_report(
+            send_email=False),  # 基准测试不发送邮件
+        'run_all_tests': run_all_tests,
+    }
+
+
+def compare(current: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            tolerance: float) -> Tuple[List[str], List[str]]:
+    """
+    与基线对比
+    Args:
+        current: 本次结果
+        baseline: 基线结果
+        tolerance: 允许的相对退化比例
+    Returns:
+        Tuple: (退化描述列表, 基线中没有相同参数结果的基准名称列表)
+    """
+    regressions, missing = [], []
+    for name, result in current.items():
+        base = baseline.get(name)
+        if not base or base.get('params') != result['params']:  # 参数不同的结果不可比
+            missing.append(name)
+            continue
+        for metric in ('median_s', 'peak_mb'):
+            if base[metric] > 0 and result[metric] > base[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{name}.{metric}: {result[metric]:.3f} > 基线 {base[metric]:.3f}"
+                    f"（+{(result[metric] / base[metric] - 1) * 100:.1f}%）")
+    return regressions, missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description='JMeter自动化框架性能基准测试')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='parse_results使用的JTL行数')
+    parser.add_argument('--plans', type=int, default=8, help='测试计划数')
+    parser.add_argument('--labels', type=int, default=50, help='事务数量')
+    parser.add_argument('--sleep', type=float, default=1.0, help='假JMeter每个计划的执行时长（秒）')
+    parser.add_argument('--plan-rows', type=int, default=20000, help='端到端测试中每个计划的JTL行数')
+    parser.add_argument('--repeat', type=int, default=3, help='每项基准的计时次数')
+    parser.add_argument('--only', nargs='+', help='只运行指定基准')
+    parser.add_argument('--workdir', type=Path, help='工作目录（默认临时目录，合成JTL会缓存于此）')
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE, help='基线文件')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='允许的相对退化比例')
+    parser.add_argument('--update-baseline', action='store_true', help='用本次结果覆盖基线')
+    parser.add_argument('--no-compare', action='store_true', help='只测量，不与基线对比')
+    args = parser.parse_args()
+
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix='jmeter_bench_'))
+    benchmarks = build_benchmarks(workdir, args.rows, args.plans, args.labels, args.sleep, args.plan_rows)
+    params = {'rows': args.rows, 'plans': args.plans, 'labels': args.labels,
+              'sleep': args.sleep, 'plan_rows': args.plan_rows}
+
+    current = {}
+    for name, func in benchmarks.items():
+        if args.only and name not in args.only:
+            continue
+        result = measure(func, args.repeat)
+        result['params'] = params
+        current[name] = result
+        print(f"{name:<22} median {result['median_s']:8.3f}s  min {result['min_s']:8.3f}s  "
+              f"peak {result['peak_mb']:8.1f}MB")
+
+    baseline = json.loads(args.baseline.read_text(encoding='utf-8')) if args.baseline.exists() else {}
+    if args.update_baseline:
+        baseline.update(current)
+        baseline['_machine'] = {'platform': platform.platform(), 'python': platform.python_version()}
+        args.baseline.write_text(json.dumps(baseline, indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"基线已更新: {args.baseline}")
+        return
+
+    if args.no_compare:
+        return
+    if not args.baseline.exists():
+        print(f"错误: 基线文件不存在: {args.baseline}，请先在基准机上使用 --update-baseline 记录"
+              f"（只测量请使用 --no-compare）", file=sys.stderr)
+        sys.exit(2)
+
+    regressions, missing = compare(current, baseline, args.tolerance)
+    if missing:
+        print(f"警告: 基线中没有相同参数的结果，未对比: {', '.join(missing)}", file=sys.stderr)
+    if regressions:
+        print("发现性能退化:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    if len(missing) == len(current):
+        sys.exit(2)
+    print("未发现性能退化")
+
+
+if __name__ == '__main__':
+    main()
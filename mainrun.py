@@ -1,43 +1,320 @@
-import JMeterTestRunner
-import ReportGenerator
+import argparse
 import sys
+from pathlib import Path
+from typing import Any, Dict, List
 
+from Config import REQUIRED_PATHS, ConfigException, load_config, missing_email_settings, require_paths
 
-def mainrun():
+# 注意：JMeterTestRunner（pandas）和ReportGenerator（plotly、jinja2）在需要时才导入，
+# 以保证 check/send 等子命令和 run 的启动不被重量级依赖拖慢
+
+
+def generate_report(results: Dict[str, Any], output_dir: Path, config: Dict[str, Any], profiler=None) -> Path:
     """
-    主程序入口
+    生成HTML汇总报告，并按配置发送邮件
+    Args:
+        results: 所有测试结果
+        output_dir: 报告输出目录
+        config: 配置字典
+        profiler: 阶段性能分析器
+    Returns:
+        Path: 报告文件路径
     """
-    # 配置信息
-    config = {
-        'jmeter_home': r"D:/apache-jmeter-5.4.1",  # Jmeter安装目录
-        'test_dir': r"D:/test/performance/program",  # JMX文件目录
-        'result_dir': r"D:/test/performance/program/test_results"  # 结果保存目录
-    }
+    import ReportGenerator
 
-    try:
-        # 创建测试运行器
-        runner = JMeterTestRunner.JMeterTestRunner(
-            config['jmeter_home'],
-            config['test_dir'],
-            config['result_dir'])
+    report_generator = ReportGenerator.ReportGenerator(results, output_dir, profiler=profiler, email_config=config)
+    return report_generator.generate_html_report(send_email=config['send_email'])
+
+
+def cmd_run(config: Dict[str, Any], args: argparse.Namespace):
+    """执行所有测试计划并生成报告"""
+    import JMeterTestRunner
+    from Profiler import PhaseProfiler
+    from Sharding import parse_shard
+
+    require_paths(config, 'jmeter_home', 'test_dir')
+    profiler = PhaseProfiler(profile_phases=config['profile_phases'])
+
+    # 创建测试运行器
+    runner = JMeterTestRunner.JMeterTestRunner(
+        config['jmeter_home'],
+        config['test_dir'],
+        config['result_dir'],
+        log_json=config['log_json'],
+        log_max_bytes=config['log_max_bytes'],
+        profiler=profiler,
+        max_workers=config['max_workers'],
+        shard=parse_shard(config['shard']),
+        include=config['include'],
+        exclude=config['exclude'],
+        tags=config['tags'],
+        history_file=config['history_file'],
+        resume=args.resume,
+        preflight=config['preflight'],
+        sanitize=config['sanitize'],
+        monitor_interval=config['monitor_interval'],
+        isolate_cpus=config['isolate_cpus'],
+        jvm_sizing=config['jvm_sizing'])
+    profiler.output_dir = runner.result_dir  # cProfile结果保存到当天结果目录
 
-        # 运行所有测试
+    # 运行所有测试
+    with profiler.span('run_all_tests'):
         runner.run_all_tests()
 
-        # 生成报告
-        if runner.all_results:
-            report_generator = ReportGenerator.ReportGenerator(
-                runner.all_results,
-                runner.result_dir
-            )
-            report_generator.generate_html_report()
-            runner.logger.info("测试报告生成完成")
+    # 生成报告
+    if args.no_report:
+        runner.logger.info("已跳过报告生成")
+    elif runner.all_results:
+        with profiler.span('generate_html_report'):
+            generate_report(runner.all_results, runner.result_dir, config, profiler)
+        runner.logger.info("测试报告生成完成")
+    else:
+        runner.logger.warning("没有成功完成的测试，跳过报告生成")
+
+    # 导出阶段耗时trace
+    # 恢复运行时使用单独的文件名，保留被中断运行的trace
+    trace_name = (f'trace_{runner.timestamp}.json' if runner.session_timestamp == runner.timestamp
+                  else f'trace_{runner.timestamp}_resumed_{runner.session_timestamp}.json')
+    trace_file = profiler.export_chrome_trace(runner.result_dir / trace_name)
+    runner.logger.info(f"阶段耗时trace已导出: {trace_file}")
+
+
+def cmd_parse(config: Dict[str, Any], args: argparse.Namespace):
+    """解析单个JTL文件并输出结果摘要"""
+    import JMeterTestRunner
+    import TestUtils
+
+    jtl_file = Path(args.jtl_file)
+    test_name = args.name or jtl_file.stem
+    summary = JMeterTestRunner.JMeterTestRunner.parse_results(jtl_file, test_name)
+    output = Path(args.output) if args.output else jtl_file.with_name('summary.npz')
+    TestUtils.TestUtils.save_summary(summary, output)
+    print(f"{test_name}: 请求数 {summary['total_requests']}，平均响应时间 {summary['average_response_time']:.2f}ms，"
+          f"TPS {summary['tps']:.2f}，错误率 {summary['error_rate']:.2f}%")
+    print(f"结果摘要已保存: {output}")
+
+
+def _collect_summary_files(paths: List[str]) -> List[Path]:
+    """展开命令行中的摘要文件和目录（目录下递归查找summary.npz及旧版的summary.json）"""
+    summary_files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            summary_files.extend(sorted(path.glob('**/summary.npz')) + sorted(path.glob('**/summary.json')))
         else:
-            runner.logger.warning("没有成功完成的测试，跳过报告生成")
+            summary_files.append(path)
+    return summary_files
+
+
+def cmd_report(config: Dict[str, Any], args: argparse.Namespace):
+    """根据已保存的结果摘要生成HTML报告"""
+    import TestUtils
+    from ResultModel import RunResults
+
+    summary_files = _collect_summary_files(args.summaries)
+    if not summary_files:
+        raise ConfigException("没有找到结果摘要文件（summary.npz/summary.json）")
+
+    results = RunResults()
+    for summary_file in summary_files:
+        summary = TestUtils.TestUtils.load_summary(summary_file)
+        results[summary['test_name']] = summary
+
+    output_dir = Path(args.output_dir) if args.output_dir else summary_files[0].parent.parent
+    output_dir.mkdir(parents=True, exist_ok=True)
+    generate_report(results, output_dir, config)
+
+
+def cmd_merge(config: Dict[str, Any], args: argparse.Namespace):
+    """合并各分片的结果，生成一份汇总报告"""
+    from Sharding import PlanHistory, collect_shard_manifests, merge_shard_manifests
+
+    manifest_files = collect_shard_manifests(args.shards)
+    results, durations, warnings = merge_shard_manifests(manifest_files)
+    for warning in warnings:
+        print(f"警告: {warning}")
+
+    output_dir = Path(args.output_dir) if args.output_dir else manifest_files[0].parent
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # 合并各分片的耗时，供下次分片均衡使用（每个分片的耗时只合并一次，重复merge不会重复计入）
+    history = PlanHistory(Path(config['history_file']) if config['history_file']
+                          else output_dir / 'plan_history.json')
+    skipped = [run_id for run_id, shard_durations in durations.items()
+               if not history.update(shard_durations, run_id)]
+    if skipped:
+        print(f"以下分片的耗时已合并过，未重复计入历史: {', '.join(skipped)}")
+    history.save()
+
+    if not results:
+        raise ConfigException("各分片均没有成功完成的测试，跳过报告生成")
+    generate_report(results, output_dir, config)
+
+
+def cmd_analyze(config: Dict[str, Any], args: argparse.Namespace):
+    """对JMX文件做静态分析"""
+    from JmxAnalyzer import JmxAnalyzer
+
+    if not args.jmx_files:
+        require_paths(config, 'test_dir')
+    jmx_files = []
+    for path in map(Path, args.jmx_files or [config['test_dir']]):
+        jmx_files.extend(sorted(path.glob('**/*.jmx')) if path.is_dir() else [path])
+
+    total_findings = 0
+    for jmx_file in jmx_files:
+        analysis = JmxAnalyzer(jmx_file).analyze()
+        duration = analysis['estimated_duration_s']
+        print(f"{jmx_file}: 峰值线程数 {analysis['peak_threads'] or '未知'}，"
+              f"预计时长 {f'{duration:.0f}s' if duration is not None else '未知'}")
+        for finding in analysis['findings']:
+            print(f"  - {finding['element']}「{finding['name']}」{finding['message']}"
+                  f"{'' if finding['sanitizable'] else '（需手动修改）'}")
+        total_findings += len(analysis['findings'])
+    if args.strict and total_findings:
+        sys.exit(1)
+
+
+def cmd_send(config: Dict[str, Any], args: argparse.Namespace):
+    """发送已生成的HTML报告"""
+    from EmailSender import EmailSender
+
+    missing = missing_email_settings(config)
+    if missing:
+        raise ConfigException(f"邮件未配置，缺少: {', '.join(missing)}（可在配置文件[email]节或环境变量中设置）")
+    sender = EmailSender(config['sender_email'], config['sender_password'],
+                         smtp_server=config['smtp_server'], smtp_port=config['smtp_port'])
+    if not sender.send_report(config['recipient_email'], args.report_file):
+        sys.exit(1)
+
+
+def cmd_check(config: Dict[str, Any], args: argparse.Namespace):
+    """检查配置和JMeter安装"""
+    import TestUtils
+
+    for key, value in config.items():
+        print(f"{key} = {'******' if key == 'sender_password' else value}")
+
+    ok = True
+    for key, hint in REQUIRED_PATHS.items():
+        if not config[key]:
+            print(f"未设置 {key}（通过{hint}设置）")
+            ok = False
+    if config['jmeter_home'] and not TestUtils.TestUtils.check_jmeter_installation(Path(config['jmeter_home'])):
+        print(f"JMeter未在指定目录找到: {config['jmeter_home']}")
+        ok = False
+    if config['test_dir'] and not Path(config['test_dir']).is_dir():
+        print(f"测试目录不存在: {config['test_dir']}")
+        ok = False
+    missing = missing_email_settings(config)
+    if config['send_email'] and missing:
+        print(f"邮件未配置（缺少 {', '.join(missing)}），报告将不会发送")
+    if not ok:
+        sys.exit(1)
+    print("配置检查通过")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(description='JMeter自动化性能测试')
+    parser.add_argument('--config', type=Path, help='INI格式配置文件')
+    parser.add_argument('--jmeter-home', help='JMeter安装目录')
+    parser.add_argument('--test-dir', help='JMX文件目录')
+    parser.add_argument('--result-dir', help='结果保存目录')
+    parser.add_argument('--no-email', dest='send_email', action='store_const', const=False, help='不发送邮件')
+    subparsers = parser.add_subparsers(dest='command')
+
+    run_parser = subparsers.add_parser('run', help='执行所有测试计划并生成报告（默认）')
+    run_parser.add_argument('--max-workers', type=int, help='最大并行数')
+    run_parser.add_argument('--no-report', action='store_true', help='只执行测试，不生成报告')
+    run_parser.add_argument('--profile-phase', dest='profile_phases', action='append',
+                            help='对指定阶段启用cProfile，可重复指定')
+    run_parser.add_argument('--log-json', action='store_const', const=True, help='输出JSON结构化日志')
+    run_parser.add_argument('--sanitize', action='store_const', const=True,
+                            help='执行禁用了监听器、调试元件等高开销元件的临时副本')
+    run_parser.add_argument('--no-preflight', dest='preflight', action='store_const', const=False,
+                            help='跳过执行前的JMX静态分析')
+    run_parser.add_argument('--monitor-interval', type=float, help='压测机自监控采样间隔（秒），0为不监控')
+    run_parser.add_argument('--isolate-cpus', action='store_const', const=True,
+                            help='为每个并行执行的计划绑定互不重叠的CPU集合（Linux）')
+    run_parser.add_argument('--no-jvm-sizing', dest='jvm_sizing', action='store_const', const=False,
+                            help='不按峰值线程数设置JMeter堆大小，使用JMeter默认值')
+    run_parser.add_argument('--resume', nargs='?', const='latest',
+                            help='恢复中断的运行，跳过已完成的计划；可指定运行清单文件，默认为最近一次运行')
+    run_parser.add_argument('--shard', help='只执行指定分片（i/n，从1开始），按历史耗时均衡分配')
+    run_parser.add_argument('--include', action='append', help='包含的JMX路径glob，可重复指定')
+    run_parser.add_argument('--exclude', action='append', help='排除的JMX路径glob，可重复指定')
+    run_parser.add_argument('--tag', dest='tags', action='append', help='只执行具有该标签的计划，可重复指定')
+
+    parse_parser = subparsers.add_parser('parse', help='解析JTL文件')
+    parse_parser.add_argument('jtl_file', help='JTL结果文件')
+    parse_parser.add_argument('--name', help='测试名称，默认取文件名')
+    parse_parser.add_argument('--output', help='摘要输出路径，默认为JTL同目录下的summary.npz，扩展名为.json时输出JSON')
+
+    report_parser = subparsers.add_parser('report', help='根据结果摘要生成HTML报告')
+    report_parser.add_argument('summaries', nargs='+', help='summary.npz（或旧版summary.json）文件或包含它们的目录')
+    report_parser.add_argument('--output-dir', help='报告输出目录')
+
+    merge_parser = subparsers.add_parser('merge', help='合并各分片结果生成一份报告')
+    merge_parser.add_argument('shards', nargs='+', help='分片清单（shard_i_of_n.json）或包含它们的目录')
+    merge_parser.add_argument('--output-dir', help='报告输出目录，未配置history_file时历史耗时也保存在该目录')
+
+    analyze_parser = subparsers.add_parser('analyze', help='对JMX做静态分析（高开销元件、峰值线程数、预计时长）')
+    analyze_parser.add_argument('jmx_files', nargs='*', help='JMX文件或目录，默认为配置中的测试目录')
+    analyze_parser.add_argument('--strict', action='store_true', help='发现高开销元件时返回码为1')
+
+    send_parser = subparsers.add_parser('send', help='发送HTML报告邮件')
+    send_parser.add_argument('report_file', help='HTML报告文件')
+
+    subparsers.add_parser('check', help='检查配置和JMeter安装')
+    return parser
+
+
+COMMANDS = {
+    'run': cmd_run,
+    'parse': cmd_parse,
+    'report': cmd_report,
+    'merge': cmd_merge,
+    'analyze': cmd_analyze,
+    'send': cmd_send,
+    'check': cmd_check,
+}
+
+
+def mainrun(argv: List[str] = None):
+    """
+    主程序入口
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:  # 不带子命令时保持原有行为：执行全部测试
+        args = parser.parse_args(list(argv if argv is not None else sys.argv[1:]) + ['run'])
+
+    try:
+        # 配置信息
+        overrides = {
+            'jmeter_home': args.jmeter_home,
+            'test_dir': args.test_dir,
+            'result_dir': args.result_dir,
+            'send_email': args.send_email,
+            'max_workers': getattr(args, 'max_workers', None),
+            'profile_phases': getattr(args, 'profile_phases', None),
+            'log_json': getattr(args, 'log_json', None),
+            'shard': getattr(args, 'shard', None),
+            'include': getattr(args, 'include', None),
+            'exclude': getattr(args, 'exclude', None),
+            'tags': getattr(args, 'tags', None),
+            'preflight': getattr(args, 'preflight', None),
+            'sanitize': getattr(args, 'sanitize', None),
+            'monitor_interval': getattr(args, 'monitor_interval', None),
+            'isolate_cpus': getattr(args, 'isolate_cpus', None),
+            'jvm_sizing': getattr(args, 'jvm_sizing', None),
+        }
+        config = load_config(args.config, overrides)
+        COMMANDS[args.command](config, args)
     except Exception as e:
         print(f"发生未预期的错误: {e}")
         sys.exit(1)
 
 
 if __name__ == "__main__":
-    mainrun()
\ No newline at end of file
+    mainrun()